@@ -1,11 +1,9 @@
 import argparse
+import os
 import sys
-from datetime import date
 
-# Relative imports since this file is in app/
-from .models.vocabulary import Vocabulary
-from .services.srs import SRS
-from .services.practice_engine import PracticeSession
+# Models and services are imported inside each command branch so simple
+# commands (and --help) don't pay for modules they never use.
 
 
 def run():
@@ -15,14 +13,31 @@ def run():
         epilog="Example: python main.py add hello -t hola -e 'Hello, how are you?'"
     )
 
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the command under cProfile and print the hottest functions")
+    parser.add_argument("--profile-out", type=str, metavar="FILE",
+                        help="Save cProfile stats to FILE instead of printing them")
+    parser.add_argument("--trace", action="store_true",
+                        help="Print per-statement SQL counts, time and rows at exit")
+    parser.add_argument("--trace-json", type=str, metavar="FILE",
+                        help="Write the SQL trace to FILE as JSON")
+
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
+    # Every command works on one learner's deck
+    user_parser = argparse.ArgumentParser(add_help=False)
+    user_parser.add_argument("-u", "--user", type=str,
+                             default=os.environ.get("ENGLISH_TRAINER_USER"),
+                             help="Learner profile, created on first use "
+                                  "(default: $ENGLISH_TRAINER_USER or 'default')")
+
     # -----------------------
     # Add word command
     # -----------------------
     add_parser = subparsers.add_parser(
         "add",
-        help="Add a new word to your vocabulary"
+        help="Add a new word to your vocabulary",
+        parents=[user_parser]
     )
     add_parser.add_argument("word", type=str, help="Word in English")
     add_parser.add_argument("-t", "--translation", type=str, help="Translation")
@@ -31,28 +46,101 @@ def run():
                            choices=["beginner", "intermediate", "advanced"],
                            help="Difficulty level")
 
+    # -----------------------
+    # Import words command
+    # -----------------------
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Import words from a CSV, TSV or JSONL file",
+        parents=[user_parser]
+    )
+    import_parser.add_argument("file", type=str, help="File to import")
+    import_parser.add_argument("-f", "--format", type=str,
+                               choices=["csv", "tsv", "jsonl"],
+                               help="File format (default: from extension)")
+    import_parser.add_argument("-l", "--level", type=str,
+                               choices=["beginner", "intermediate", "advanced"],
+                               help="Level for rows that don't set one")
+    import_parser.add_argument("--chunk-size", type=int, default=10000,
+                               help="Rows per transaction (default: 10000)")
+
+    # -----------------------
+    # Export command
+    # -----------------------
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Export every table to CSV or JSONL files"
+    )
+    export_parser.add_argument("directory", type=str, help="Directory to write the files to")
+    export_parser.add_argument("-f", "--format", type=str, default="jsonl",
+                               choices=["csv", "jsonl"],
+                               help="File format (default: jsonl)")
+    export_parser.add_argument("-z", "--gzip", action="store_true",
+                               help="Compress the files with gzip")
+    export_parser.add_argument("--tables", nargs="+", metavar="TABLE",
+                               help="Export only these tables")
+
+    # -----------------------
+    # Backup command
+    # -----------------------
+    backup_parser = subparsers.add_parser(
+        "backup",
+        help="Copy the database to a file, safe while it is in use"
+    )
+    backup_parser.add_argument("file", type=str, help="Backup file to write")
+    backup_parser.add_argument("--pages", type=int, default=1024,
+                               help="Pages copied per step (default: 1024)")
+
     # -----------------------
     # List words command
     # -----------------------
     list_parser = subparsers.add_parser(
         "list",
-        help="List all words in your vocabulary"
+        help="List all words in your vocabulary",
+        parents=[user_parser]
+    )
+    list_parser.add_argument("--limit", type=int, help="Show at most this many words")
+    list_parser.add_argument("--offset", type=int, default=0,
+                             help="Skip this many words first (default: 0)")
+    list_parser.add_argument("--level", type=str,
+                             choices=["beginner", "intermediate", "advanced"],
+                             help="Only show words of this level")
+    list_parser.add_argument("--due", action="store_true",
+                             help="Only show words due for review")
+
+    # -----------------------
+    # Search command
+    # -----------------------
+    search_parser = subparsers.add_parser(
+        "search",
+        help="Search words, translations and examples",
+        parents=[user_parser]
     )
+    search_parser.add_argument("query", type=str, help="Words or word prefixes to find")
+    search_parser.add_argument("-n", "--number", type=int, default=20,
+                               help="Maximum results (default: 20)")
 
     # -----------------------
     # Practice command (simple version)
     # -----------------------
     practice_parser = subparsers.add_parser(
         "practice",
-        help="Practice with a random word (simple mode)"
+        help="Practice with a random word (simple mode)",
+        parents=[user_parser]
     )
+    practice_parser.add_argument("--level", type=str,
+                                 choices=["beginner", "intermediate", "advanced"],
+                                 help="Only pick words of this level")
+    practice_parser.add_argument("--due", action="store_true",
+                                 help="Only pick words due for review")
 
     # -----------------------
     # Session command (full practice session)
     # -----------------------
     session_parser = subparsers.add_parser(
         "session",
-        help="Start a practice session with multiple words"
+        help="Start a practice session with multiple words",
+        parents=[user_parser]
     )
     session_parser.add_argument(
         "-n", "--number",
@@ -60,13 +148,43 @@ def run():
         default=10,
         help="Number of words to practice (default: 10)"
     )
+    session_parser.add_argument("-c", "--continuous", action="store_true",
+                                help="Keep going until no words are due (ignores --number)")
+    session_parser.add_argument("-m", "--minutes", type=float,
+                                help="End the session after this many minutes")
+    session_parser.add_argument("--new", type=int, default=20,
+                                help="New cards allowed per day (default: 20)")
+    session_parser.add_argument("--reviews", type=int, default=200,
+                                help="Reviews of learned cards allowed per day (default: 200)")
+
+    # -----------------------
+    # Leeches command (suspended cards)
+    # -----------------------
+    leeches_parser = subparsers.add_parser(
+        "leeches",
+        help="List cards suspended after repeated lapses, or unsuspend them",
+        parents=[user_parser]
+    )
+    leeches_parser.add_argument("--unsuspend", type=int, nargs="*", metavar="ID",
+                                help="Put these cards (all if no IDs are given) back in the queue")
+
+    # -----------------------
+    # Dedupe command (merge duplicate words)
+    # -----------------------
+    dedupe_parser = subparsers.add_parser(
+        "dedupe",
+        help="Merge words that differ only in case, spacing or Unicode form"
+    )
+    dedupe_parser.add_argument("--dry-run", action="store_true",
+                               help="Only report what would be merged")
 
     # -----------------------
     # Delete word command
     # -----------------------
     delete_parser = subparsers.add_parser(
         "delete",
-        help="Delete a word by ID"
+        help="Delete a word by ID",
+        parents=[user_parser]
     )
     delete_parser.add_argument("id", type=int, help="Word ID to delete")
 
@@ -75,61 +193,305 @@ def run():
     # -----------------------
     stats_parser = subparsers.add_parser(
         "stats",
-        help="Show your learning statistics"
+        help="Show your learning statistics",
+        parents=[user_parser]
+    )
+    stats_range = stats_parser.add_mutually_exclusive_group()
+    stats_range.add_argument("--week", action="store_true",
+                             help="Show day-by-day practice for the last 7 days")
+    stats_range.add_argument("--range", nargs=2, metavar=("FROM", "TO"),
+                             help="Show day-by-day practice between two dates (YYYY-MM-DD)")
+
+    # -----------------------
+    # Write command
+    # -----------------------
+    write_parser = subparsers.add_parser(
+        "write",
+        help="Analyze a text you wrote against your vocabulary",
+        parents=[user_parser]
+    )
+    write_parser.add_argument("file", type=str, nargs="?", default="-",
+                              help="Text file to analyze (default: read stdin)")
+    write_parser.add_argument("-t", "--topic", type=str, help="What the text is about")
+    write_parser.add_argument("--no-save", action="store_true",
+                              help="Show the analysis without storing the text")
+    write_parser.add_argument("--history", action="store_true",
+                              help="List your latest texts instead")
+
+    # -----------------------
+    # Grammar command
+    # -----------------------
+    grammar_parser = subparsers.add_parser(
+        "grammar",
+        help="Grammar exercises by topic and level",
+        parents=[user_parser]
+    )
+    grammar_parser.add_argument("--bank", type=str,
+                                help="Exercise bank file (default: data/grammar_bank.bin)")
+    grammar_commands = grammar_parser.add_subparsers(dest="grammar_command")
+
+    grammar_import = grammar_commands.add_parser(
+        "import", help="Build the exercise bank from a CSV or JSONL file"
+    )
+    grammar_import.add_argument("file", type=str,
+                                help="Exercises with topic, difficulty, prompt, answer, hint")
+    grammar_import.add_argument("-f", "--format", type=str, choices=["csv", "jsonl"],
+                                help="File format (default: from extension)")
+
+    grammar_commands.add_parser("topics", help="List topics with exercise counts and your mastery")
+
+    grammar_practice = grammar_commands.add_parser("practice", help="Practice a topic")
+    grammar_practice.add_argument("topic", type=str, nargs="?",
+                                  help="Topic to practice (default: mixed topics)")
+    grammar_practice.add_argument("-l", "--level", type=str,
+                                  choices=["beginner", "intermediate", "advanced"],
+                                  help="Only exercises of this difficulty")
+    grammar_practice.add_argument("-n", "--number", type=int, default=10,
+                                  help="Number of exercises (default: 10)")
+
+    # -----------------------
+    # Report command
+    # -----------------------
+    report_parser = subparsers.add_parser(
+        "report",
+        help="Show streaks, weekly and monthly totals and a practice heatmap",
+        parents=[user_parser]
+    )
+    report_parser.add_argument("--weeks", type=int, default=8,
+                               help="Weeks in the weekly table (default: 8)")
+    report_parser.add_argument("--months", type=int, default=6,
+                               help="Months in the monthly table (default: 6)")
+    report_parser.add_argument("--no-heatmap", action="store_true",
+                               help="Leave out the year heatmap")
+
+    # -----------------------
+    # Forecast command
+    # -----------------------
+    forecast_parser = subparsers.add_parser(
+        "forecast",
+        help="Simulate your review load for the coming days",
+        parents=[user_parser]
+    )
+    forecast_parser.add_argument("-d", "--days", type=int, default=30,
+                                 help="Days to forecast (default: 30)")
+    forecast_parser.add_argument("-r", "--retention", type=float, default=0.9,
+                                 help="Share of reviews answered right (default: 0.9)")
+    forecast_parser.add_argument("--runs", type=int,
+                                 help="Monte Carlo runs (default: 5, fewer for "
+                                      "large decks over long horizons)")
+    forecast_parser.add_argument("--seed", type=int, help="Random seed for repeatable results")
+
+    # -----------------------
+    # Users command
+    # -----------------------
+    subparsers.add_parser(
+        "users",
+        help="List learner profiles"
     )
 
+    # -----------------------
+    # Serve command
+    # -----------------------
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run the local HTTP/JSON review API"
+    )
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1",
+                              help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("-p", "--port", type=int, default=8000,
+                              help="Port to listen on (default: 8000)")
+    serve_parser.add_argument("--new", type=int, default=20,
+                              help="New cards per learner per day (default: 20)")
+    serve_parser.add_argument("--reviews", type=int, default=200,
+                              help="Reviews per learner per day (default: 200)")
+
     # -----------------------
     # Parse and execute
     # -----------------------
     args = parser.parse_args()
 
+    trace = os.environ.get("ENGLISH_TRAINER_TRACE", "")
+    if args.trace or args.trace_json or trace:
+        from .profiling import start_tracing
+        start_tracing(args.trace_json or (trace if trace.endswith(".json") else None))
+
+    if args.profile or args.profile_out:
+        from .profiling import start_profiler
+        start_profiler(args.profile_out)
+
+    if args.command:
+        from .database import init_db
+        init_db()
+
+    if getattr(args, "user", None) is not None:
+        from .models.user import User
+        user_id = User.get_or_create(args.user)
+    else:
+        from .database import DEFAULT_USER_ID
+        user_id = DEFAULT_USER_ID
+
     if args.command == "add":
         try:
+            from .models.vocabulary import Vocabulary
+
             Vocabulary.add_word(
                 args.word,
                 args.translation,
                 args.example,
-                args.level
+                args.level,
+                user_id=user_id
             )
-            print(f"✓ Word '{args.word}' added successfully!")
+            print(f"✓ Word '{args.word}' saved successfully!")
             sys.exit(0)
         except Exception as e:
             print(f"✗ Error adding word: {e}", file=sys.stderr)
             sys.exit(1)
 
+    elif args.command == "import":
+        try:
+            from .services.importer import import_file
+
+            result = import_file(
+                args.file,
+                fmt=args.format,
+                default_level=args.level,
+                chunk_size=args.chunk_size,
+                user_id=user_id
+            )
+            print(f"✓ Imported {result.inserted} words from '{args.file}'")
+            print(f"    Skipped: {result.duplicates} duplicates, {result.invalid} invalid rows")
+            print(f"    Time: {result.elapsed:.2f} seconds ({result.rate:,.0f} rows/sec)")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error importing words: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "export":
+        try:
+            from .services.exporter import TABLES, export_tables
+
+            result = export_tables(
+                args.directory,
+                fmt=args.format,
+                compress=args.gzip,
+                tables=args.tables or TABLES,
+                progress=lambda table, rows: print(f"  {table:<20}{rows:>10} rows")
+            )
+            print(f"✓ Exported {result.total} rows from {len(result.rows)} tables "
+                  f"to '{args.directory}' in {result.elapsed:.2f} seconds")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error exporting data: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "backup":
+        try:
+            import time
+            from .services.exporter import backup
+
+            def progress(copied, total):
+                print(f"\r  Copied {copied}/{total} pages", end="", flush=True)
+
+            start = time.perf_counter()
+            backup(args.file, pages=args.pages, progress=progress)
+            print(f"\n✓ Database backed up to '{args.file}' "
+                  f"in {time.perf_counter() - start:.2f} seconds")
+            sys.exit(0)
+        except Exception as e:
+            print(f"\n✗ Error backing up database: {e}", file=sys.stderr)
+            sys.exit(1)
+
     elif args.command == "list":
         try:
-            words = Vocabulary.get_all_words()
+            from .models.vocabulary import Vocabulary
+
+            words = Vocabulary.iter_words(
+                level=args.level,
+                due=args.due,
+                limit=args.limit,
+                offset=args.offset,
+                user_id=user_id
+            )
+
+            # Output is written a page at a time so the first words show
+            # up immediately without holding the whole list in memory
+            out = sys.stdout
+            buffer = []
+            count = 0
+
+            for w in words:
+                if count == 0:
+                    buffer.append(f"\n{'='*70}\n  Your Vocabulary\n{'='*70}\n\n")
+
+                word_id, word, translation, example, level, next_review, interval, reps = w
+                buffer.append(f"[{word_id}] {word}\n")
+                if translation:
+                    buffer.append(f"    → {translation}\n")
+                if level:
+                    buffer.append(f"    Level: {level}\n")
+                if next_review:
+                    buffer.append(f"    Next review: {next_review} (interval: {interval} days, reps: {reps})\n")
+                buffer.append("\n")
+
+                count += 1
+                if count % 200 == 0:
+                    out.write("".join(buffer))
+                    out.flush()
+                    buffer = []
+
+            if count == 0:
+                if args.level or args.due or args.offset:
+                    print("No words match those filters.")
+                else:
+                    print("No words in your vocabulary yet. Add some with 'add' command!")
+                sys.exit(0)
+
+            buffer.append(f"{'='*70}\n  {count} words shown\n{'='*70}\n")
+            out.write("".join(buffer))
+            out.flush()
+
+            sys.exit(0)
+        except BrokenPipeError:
+            # Output piped into `head` or a pager that quit early
+            sys.stderr.close()
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error listing words: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "search":
+        try:
+            from .models.vocabulary import Vocabulary
+
+            words = Vocabulary.search(args.query, limit=args.number, user_id=user_id)
 
             if not words:
-                print("No words in your vocabulary yet. Add some with 'add' command!")
+                print(f"No words match '{args.query}'.")
                 sys.exit(0)
 
             print(f"\n{'='*70}")
-            print(f"  Your Vocabulary ({len(words)} words)")
+            print(f"  Search results for '{args.query}' ({len(words)})")
             print(f"{'='*70}\n")
 
             for w in words:
-                word_id, word, translation, example, level, next_review, interval, reps = w
+                word_id, word, translation, example, level, *_ = w
                 print(f"[{word_id}] {word}")
                 if translation:
                     print(f"    → {translation}")
-                if level:
-                    print(f"    Level: {level}")
-                if next_review:
-                    print(f"    Next review: {next_review} (interval: {interval} days, reps: {reps})")
+                if example:
+                    print(f"    Example: {example}")
                 print()
 
             sys.exit(0)
         except Exception as e:
-            print(f"✗ Error listing words: {e}", file=sys.stderr)
+            print(f"✗ Error searching words: {e}", file=sys.stderr)
             sys.exit(1)
 
     elif args.command == "delete":
         try:
-            word = Vocabulary.get_word_by_id(args.id)
-            if word:
-                Vocabulary.delete_word(args.id)
+            from .models.vocabulary import Vocabulary
+
+            if Vocabulary.remove_card(args.id, user_id):
                 print(f"✓ Word deleted successfully!")
             else:
                 print(f"✗ Word with ID {args.id} not found.")
@@ -140,8 +502,13 @@ def run():
 
     elif args.command == "practice":
         try:
+            from .models.vocabulary import Vocabulary
+            from .services.answer_matcher import check_answer
+            from .services.scheduler import grade_for
+            from .services.srs import SRS
+
             # Simple random word practice (original)
-            word = Vocabulary.get_random_word()
+            word = Vocabulary.get_random_word(level=args.level, due=args.due, user_id=user_id)
 
             if not word:
                 print("No words available. Add some first with 'add' command!")
@@ -158,12 +525,16 @@ def run():
 
             user_answer = input("Your answer: ").strip()
 
-            if translation and user_answer.lower() == translation.lower():
+            match = check_answer(user_answer, translation)
+            if match.typo:
+                print(f"✓ Correct, watch the spelling: {match.expected}")
+            elif match.correct:
                 print("✓ Correct!")
-                SRS.update_word_review(word_id, True)
             else:
                 print(f"✗ Incorrect. Correct answer: {translation}")
-                SRS.update_word_review(word_id, False)
+            SRS.update_word_review(word_id, match.correct,
+                                   grade=grade_for(match.correct, match.typo),
+                                   user_id=user_id)
 
             sys.exit(0)
         except KeyboardInterrupt:
@@ -175,42 +546,120 @@ def run():
 
     elif args.command == "session":
         try:
+            from .services.srs import SRS
+            from .services.practice_engine import PracticeSession
+
             # Full practice session with progress tracking
             srs = SRS()
-            session = PracticeSession(srs)
-            session.run(limit=args.number)
+            session = PracticeSession(srs, user_id=user_id)
+            session.run(
+                limit=args.number,
+                continuous=args.continuous,
+                time_budget=args.minutes * 60 if args.minutes else None,
+                new_limit=args.new,
+                review_limit=args.reviews
+            )
             sys.exit(0)
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
+            # The session has already saved the answers given so far
             print("\n\nSession cancelled.")
             sys.exit(0)
         except Exception as e:
             print(f"✗ Error during session: {e}", file=sys.stderr)
             sys.exit(1)
 
-    elif args.command == "stats":
+    elif args.command == "leeches":
+        try:
+            from .services.srs import SRS
+            from .services.scheduler import LEECH_LAPSES
+
+            if args.unsuspend is not None:
+                count = SRS.unsuspend(args.unsuspend or None, user_id=user_id)
+                print(f"✓ Unsuspended {count} card(s); they are due today")
+                sys.exit(0)
+
+            leeches = SRS.get_leeches(user_id=user_id)
+            if not leeches:
+                print(f"No suspended cards. Cards are suspended after {LEECH_LAPSES} lapses.")
+                sys.exit(0)
+
+            print(f"\n{'='*70}")
+            print(f"  Suspended cards ({len(leeches)})")
+            print(f"{'='*70}\n")
+
+            for word_id, word, translation, lapses in leeches:
+                print(f"[{word_id}] {word} → {translation}  ({lapses} lapses)")
+
+            print("\n  Unsuspend with 'leeches --unsuspend ID' (no IDs: all)\n")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error listing leeches: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "dedupe":
         try:
-            from .database import get_connection
-            conn = get_connection()
-            cursor = conn.cursor()
+            from .models.vocabulary import Vocabulary
 
-            # Get total words
-            cursor.execute("SELECT COUNT(*) FROM vocabulary")
-            total_words = cursor.fetchone()[0]
+            groups, words, cards = Vocabulary.dedupe(dry_run=args.dry_run)
+            if not words:
+                print("No duplicate words found.")
+            elif args.dry_run:
+                print(f"Would merge {words} duplicate word(s) into {groups}, "
+                      f"combining {cards} card(s). Run without --dry-run to apply.")
+            else:
+                print(f"✓ Merged {words} duplicate word(s) into {groups}, "
+                      f"combining {cards} card(s)")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error merging duplicates: {e}", file=sys.stderr)
+            sys.exit(1)
 
-            # Get today's stats
-            today = date.today().strftime("%Y-%m-%d")
-            cursor.execute("""
-                SELECT words_reviewed, words_correct, accuracy, session_duration
-                FROM daily_progress
-                WHERE date = ?
-            """, (today,))
+    elif args.command == "stats":
+        try:
+            from datetime import date, timedelta
+            from .models.stats import Stats
+
+            if args.week or args.range:
+                if args.range:
+                    start = date.fromisoformat(args.range[0])
+                    end = date.fromisoformat(args.range[1])
+                else:
+                    end = date.today()
+                    start = end - timedelta(days=6)
+
+                days = Stats.daily(start, end, user_id=user_id)
+
+                print(f"\n{'='*50}")
+                print(f"  Practice {start} → {end}")
+                print(f"{'='*50}")
+                print(f"  {'Date':<12}{'Reviewed':>10}{'Correct':>9}{'Accuracy':>10}{'Time':>8}")
+
+                total_reviewed = total_correct = 0
+                for day, reviewed, correct, duration in days:
+                    accuracy = (correct / reviewed) * 100 if reviewed else 0
+                    print(f"  {day:<12}{reviewed:>10}{correct:>9}{accuracy:>9.1f}%{duration:>7}s")
+                    total_reviewed += reviewed
+                    total_correct += correct
+
+                if not days:
+                    print("  No practice in this period.")
+                else:
+                    accuracy = (total_correct / total_reviewed) * 100 if total_reviewed else 0
+                    print(f"  {'Total':<12}{total_reviewed:>10}{total_correct:>9}{accuracy:>9.1f}%")
+
+                print(f"{'='*50}\n")
+                sys.exit(0)
 
-            today_stats = cursor.fetchone()
+            deck = Stats.deck_summary(user_id=user_id)
+            today_stats = Stats.get_day(user_id=user_id)
 
             print(f"\n{'='*50}")
             print("  Your Statistics")
             print(f"{'='*50}")
-            print(f"  Total vocabulary: {total_words} words")
+            print(f"  Total vocabulary: {deck['total']} words")
+            for level, cards in deck['levels'].items():
+                print(f"    {level or 'no level'}: {cards}")
+            print(f"  Due today: {deck['due_today']}  (next 7 days: {deck['due_week']})")
 
             if today_stats:
                 reviewed, correct, accuracy, duration = today_stats
@@ -222,14 +671,234 @@ def run():
             else:
                 print("\n  No practice today yet. Start with 'session' command!")
 
+            print(f"\n  Rolling accuracy:")
+            for days in (7, 30):
+                reviewed, _, accuracy = Stats.accuracy(days, user_id=user_id)
+                print(f"    Last {days} days: {accuracy:.1f}% ({reviewed} reviews)")
+
             print(f"{'='*50}\n")
 
-            conn.close()
             sys.exit(0)
         except Exception as e:
             print(f"✗ Error showing stats: {e}", file=sys.stderr)
             sys.exit(1)
 
+    elif args.command == "write":
+        try:
+            from .models.practice import WritingPractice
+
+            if args.history:
+                print(f"\n{'='*50}")
+                print("  Writing History")
+                print(f"{'='*50}")
+                entries = WritingPractice.history(user_id=user_id)
+                for entry_id, day, topic, word_count in entries:
+                    print(f"  [{entry_id}] {day}  {word_count:>6} words  {topic or ''}")
+                if not entries:
+                    print("  Nothing written yet.")
+                print(f"{'='*50}\n")
+                sys.exit(0)
+
+            if args.file == "-":
+                if sys.stdin.isatty():
+                    print("Type or paste your text, then press Ctrl-D:")
+                analysis = WritingPractice.analyze(sys.stdin, user_id=user_id)
+            else:
+                with open(args.file, encoding="utf-8") as handle:
+                    analysis = WritingPractice.analyze(handle, user_id=user_id)
+
+            if not analysis.word_count:
+                print("✗ No words to analyze", file=sys.stderr)
+                sys.exit(1)
+
+            coverage = analysis.known / analysis.word_count * 100
+            print(f"\n{'='*50}")
+            print(f"  Writing Analysis{': ' + args.topic if args.topic else ''}")
+            print(f"{'='*50}")
+            print(f"  Words: {analysis.word_count} ({analysis.distinct} distinct)")
+            print(f"  Deck vocabulary: {coverage:.1f}% of the text")
+            print(f"  Deck words used: {len(analysis.used)}")
+            top = sorted(analysis.used.items(), key=lambda item: (-item[1], item[0]))
+            for word, count in top[:20]:
+                print(f"    {word:<24}{count:>5}×")
+            if len(top) > 20:
+                print(f"    ... {len(top) - 20} more")
+
+            if not args.no_save:
+                entry_id = WritingPractice.save(analysis, topic=args.topic, user_id=user_id)
+                print(f"\n✓ Saved as entry {entry_id}")
+            print(f"{'='*50}\n")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error analyzing text: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "grammar":
+        session = None
+        try:
+            from .services.exercise_bank import ExerciseBank, build_bank, read_exercises
+
+            if args.grammar_command == "import":
+                import time
+
+                start = time.perf_counter()
+                count = build_bank(read_exercises(args.file, args.format), args.bank)
+                print(f"✓ Packed {count} exercises from '{args.file}' "
+                      f"in {time.perf_counter() - start:.2f} seconds")
+                sys.exit(0)
+
+            elif args.grammar_command == "topics":
+                from .models.grammar import GrammarTopic
+
+                mastery = GrammarTopic.get_mastery(user_id=user_id)
+                with ExerciseBank(args.bank) as bank:
+                    topics = bank.topics()
+
+                print(f"\n{'='*50}")
+                print("  Grammar Topics")
+                print(f"{'='*50}")
+                print(f"  {'Topic':<26}{'Exercises':>10}{'Mastery':>10}")
+                for topic, levels in sorted(topics.items()):
+                    score = mastery.get(topic, (None, None))[1]
+                    print(f"  {topic:<26}{sum(levels.values()):>10}"
+                          f"{'-' if score is None else f'{score}%':>10}")
+                print(f"{'='*50}\n")
+                sys.exit(0)
+
+            elif args.grammar_command == "practice":
+                from .services.grammar_practice import GrammarSession
+
+                with ExerciseBank(args.bank) as bank:
+                    session = GrammarSession(bank, user_id=user_id)
+                    session.run(args.topic, args.level, args.number)
+                sys.exit(0)
+
+            else:
+                grammar_parser.print_help()
+                sys.exit(0)
+        except KeyboardInterrupt:
+            print("\n\nSession cancelled.")
+            if session is not None:
+                # Keep the mastery earned before the interrupt
+                session.save()
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error in grammar: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "report":
+        try:
+            from datetime import date, timedelta
+            from .services.progress_tracker import ProgressTracker
+
+            today = date.today()
+            streaks = ProgressTracker.streaks(today, user_id=user_id)
+
+            print(f"\n{'='*62}")
+            print("  Progress Report")
+            print(f"{'='*62}")
+            print(f"  Current streak: {streaks.current} days")
+            if streaks.longest:
+                print(f"  Longest streak: {streaks.longest} days "
+                      f"({streaks.longest_start} → {streaks.longest_end})")
+            print(f"  Active days:    {streaks.active_days}")
+
+            for period, count in (("week", args.weeks), ("month", args.months)):
+                totals = ProgressTracker.totals(period, count, today, user_id=user_id)
+                print(f"\n  {'Week of' if period == 'week' else 'Month':<12}{'Days':>5}{'Reviewed':>10}"
+                      f"{'Accuracy':>10}{'Trend':>8}{'Change':>8}{'Written':>9}")
+                for row in totals:
+                    label = row.start if period == "week" else row.start[:7]
+                    change = "" if row.change is None else f"{row.change:+d}"
+                    print(f"  {label:<12}{row.days:>5}{row.reviewed:>10}"
+                          f"{row.accuracy or 0:>9.1f}%{row.trend or 0:>7.1f}%{change:>8}{row.written:>9}")
+                if not totals:
+                    print(f"  No practice in the last {count} {period}s.")
+
+            if not args.no_heatmap:
+                # 53 week columns ending with this week, Monday to Sunday rows
+                start = today - timedelta(days=today.weekday() + 52 * 7)
+                cells = ProgressTracker.heatmap((today - start).days + 1, today, user_id=user_id)
+                shades = " ░▒▓█"
+
+                print("\n  Last 12 months")
+                for weekday, name in enumerate(("Mon", "", "Wed", "", "Fri", "", "Sun")):
+                    line = ""
+                    for week in range(53):
+                        day = start + timedelta(days=week * 7 + weekday)
+                        if day > today:
+                            break
+                        line += shades[cells.get(day.isoformat(), (0, 0))[1]]
+                    print(f"  {name:<4}{line}")
+                print(f"      less {shades[1:]} more")
+
+            print(f"{'='*62}\n")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error building report: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "forecast":
+        try:
+            from datetime import timedelta
+            from .services.forecast import default_runs, load_deck, simulate
+
+            deck = load_deck(user_id=user_id)
+            if not len(deck[0]):
+                print("No cards to forecast. Add some words first!")
+                sys.exit(0)
+            # Day by day for a month or less, otherwise week by week
+            step = 1 if args.days <= 31 else 7
+            runs = args.runs if args.runs is not None else default_runs(len(deck[0]), args.days)
+            forecast = simulate(deck, args.days, retention=args.retention,
+                                runs=runs, seed=args.seed, step=step)
+
+            print(f"\n{'='*50}")
+            print(f"  Review forecast: {forecast.cards} cards, {args.days} days, "
+                  f"{args.retention:.0%} retention, {forecast.runs} run(s)")
+            print(f"{'='*50}")
+            print(f"  {'Date' if step == 1 else 'Week of':<12}{'Reviews':>10}{'p10':>10}{'p90':>10}")
+            for n, (mean, low, high) in enumerate(zip(forecast.mean, forecast.low, forecast.high)):
+                day = forecast.start + timedelta(days=n * step)
+                print(f"  {day.isoformat():<12}{mean:>10.0f}{low:>10}{high:>10}")
+
+            total = sum(forecast.mean)
+            peak = max(range(len(forecast.mean)), key=forecast.mean.__getitem__)
+            print(f"\n  Total: {total:,.0f} reviews ({total / args.days:,.1f}/day)")
+            print(f"  Busiest {'day' if step == 1 else 'week'}: {forecast.mean[peak]:,.0f} "
+                  f"reviews, {forecast.start + timedelta(days=peak * step)}")
+            print(f"{'='*50}\n")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error forecasting reviews: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "users":
+        try:
+            from .models.user import User
+
+            print(f"\n{'='*50}")
+            print("  Learners")
+            print(f"{'='*50}")
+            for uid, name, cards, created_at in User.get_all():
+                print(f"  [{uid}] {name:<20}{cards:>8} cards   since {created_at}")
+            print(f"{'='*50}\n")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error listing users: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "serve":
+        try:
+            from .server import serve
+
+            serve(args.host, args.port, new_limit=args.new, review_limit=args.reviews)
+            print("\nServer stopped.")
+            sys.exit(0)
+        except Exception as e:
+            print(f"✗ Error running server: {e}", file=sys.stderr)
+            sys.exit(1)
+
     else:
         parser.print_help()
         sys.exit(0)
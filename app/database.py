@@ -1,6 +1,14 @@
+from contextlib import contextmanager
 from pathlib import Path
+import atexit
+import functools
+import os
+import random
 import sqlite3
 import sys
+import threading
+import time
+import unicodedata
 
 
 # =============================
@@ -9,28 +17,412 @@ import sys
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
-DB_PATH = DATA_DIR / "english_trainer.db"
+DB_PATH = Path(os.environ.get("ENGLISH_TRAINER_DB", DATA_DIR / "english_trainer.db"))
 
 
 # =============================
-# Connection
+# Connection Settings
 # =============================
 
-def get_connection():
-    """Return a configured SQLite connection."""
+# Applied to every new connection, in order. Use configure() to change them.
+# WAL lets readers keep going while one writer commits, and NORMAL sync is
+# durable across application crashes (only an OS crash can drop the last
+# commits). Set ENGLISH_TRAINER_JOURNAL_MODE=DELETE for the old behaviour,
+# e.g. on network filesystems where WAL's shared memory doesn't work.
+PRAGMAS = {
+    "foreign_keys": "ON",
+    "journal_mode": os.environ.get("ENGLISH_TRAINER_JOURNAL_MODE", "WAL"),
+    "synchronous": "NORMAL",
+}
+
+BUSY_TIMEOUT = 10.0
+
+# Write transactions that still hit "database is locked" after the busy
+# timeout are retried this many times with exponential backoff
+RETRY_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+
+# Size of sqlite3's per-connection prepared statement cache
+CACHED_STATEMENTS = 256
+
+
+# =============================
+# Schema Version
+# =============================
+
+# Bump whenever the schema, migrations or INDEXES change. init_db() records
+# the applied version in PRAGMA user_version and skips all work when the
+# database is already current.
+SCHEMA_VERSION = 11
+
+
+# =============================
+# Users
+# =============================
+
+# Every database has this learner; commands use it when no --user is given
+DEFAULT_USER_ID = 1
+DEFAULT_USER = "default"
+
+
+# =============================
+# Indexes
+# =============================
+
+INDEXES = {
+    # Per-user due queue: WHERE user_id = ? AND next_review <= ?. Carries
+    # the columns ReviewQueue ranks cards by, and the table's primary key
+    # (user_id, word_id) rides along, so the queue is read from the index
+    # alone. Suspended cards have no next_review and never match.
+    "idx_user_cards_queue": "user_cards (user_id, next_review, interval, ease_factor, lapses)",
+    # Removing a word removes every learner's card for it
+    "idx_user_cards_word": "user_cards (word_id)",
+    # Level filters, and keyset paging by word within a level
+    "idx_vocabulary_level_word": "vocabulary (level, word)",
+    # Keyset paging on (word, id); the rowid is implicit in the index
+    "idx_vocabulary_word": "vocabulary (word)",
+    # One shared word per normalized spelling; the conflict target of the
+    # upserts in Vocabulary. Rows with a NULL key (duplicates left by older
+    # versions, until `dedupe` merges them) don't take part.
+    "idx_vocabulary_word_key": "UNIQUE vocabulary (word_key)",
+    # save_progress and stats look up a learner's row by date
+    "idx_daily_progress_user_date": "daily_progress (user_id, date)",
+    # Per-card history, covering the columns interval analyses read
+    "idx_review_log_word": "review_log (user_id, word_id, reviewed_at, grade, new_interval)",
+    # Time-window scans (accuracy over the last N days)
+    "idx_review_log_time": "review_log (user_id, reviewed_at, grade)",
+    # A learner's writing history, newest first
+    "idx_writing_practice_user_date": "writing_practice (user_id, date)",
+    # A learner's grammar topics by name (mastery updates)
+    "idx_grammar_topics_user_name": "grammar_topics (user_id, name)",
+}
+
+
+# =============================
+# Triggers
+# =============================
+
+# Keep the materialized counters in deck_stats (cards per learner and level)
+# and due_counts (cards per learner and next_review day) in step with
+# user_cards, so stats never has to scan a deck. NULL levels and dates are
+# counted under ''.
+_COUNT_UP = """
+    INSERT INTO {table} (user_id, {key}, cards) VALUES ({user}, COALESCE({value}, ''), 1)
+    ON CONFLICT (user_id, {key}) DO UPDATE SET cards = cards + 1;
+"""
+_COUNT_DOWN = """
+    UPDATE {table} SET cards = cards - 1
+    WHERE user_id = {user} AND {key} = COALESCE({value}, '');
+    DELETE FROM {table}
+    WHERE user_id = {user} AND {key} = COALESCE({value}, '') AND cards <= 0;
+"""
+_CARD_LEVEL = "(SELECT level FROM vocabulary WHERE id = {}.word_id)"
+
+# Count writes to a learner's daily_progress rows in progress_versions, so
+# cached progress reports can tell whether they are stale with one lookup
+_BUMP_PROGRESS = """
+    INSERT INTO progress_versions (user_id, version) VALUES ({user}, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+"""
+
+TRIGGERS = {
+    "trg_user_cards_stats_insert": (
+        "AFTER INSERT ON user_cards",
+        _COUNT_UP.format(table="deck_stats", key="level", user="new.user_id",
+                         value=_CARD_LEVEL.format("new"))
+        + _COUNT_UP.format(table="due_counts", key="day", user="new.user_id",
+                           value="new.next_review"),
+    ),
+    "trg_user_cards_stats_delete": (
+        "AFTER DELETE ON user_cards",
+        _COUNT_DOWN.format(table="deck_stats", key="level", user="old.user_id",
+                           value=_CARD_LEVEL.format("old"))
+        + _COUNT_DOWN.format(table="due_counts", key="day", user="old.user_id",
+                             value="old.next_review"),
+    ),
+    "trg_user_cards_stats_review": (
+        "AFTER UPDATE OF next_review ON user_cards WHEN old.next_review IS NOT new.next_review",
+        _COUNT_DOWN.format(table="due_counts", key="day", user="old.user_id",
+                           value="old.next_review")
+        + _COUNT_UP.format(table="due_counts", key="day", user="new.user_id",
+                           value="new.next_review"),
+    ),
+    # A word's level change moves every learner's card between levels
+    "trg_vocabulary_stats_level": (
+        "AFTER UPDATE OF level ON vocabulary WHEN old.level IS NOT new.level",
+        """
+        UPDATE deck_stats SET cards = cards - 1
+        WHERE level = COALESCE(old.level, '')
+          AND user_id IN (SELECT user_id FROM user_cards WHERE word_id = new.id);
+        DELETE FROM deck_stats WHERE level = COALESCE(old.level, '') AND cards <= 0;
+        INSERT INTO deck_stats (user_id, level, cards)
+        SELECT user_id, COALESCE(new.level, ''), 1 FROM user_cards WHERE word_id = new.id
+        ON CONFLICT (user_id, level) DO UPDATE SET cards = cards + 1;
+        """,
+    ),
+    "trg_daily_progress_version_insert": (
+        "AFTER INSERT ON daily_progress",
+        _BUMP_PROGRESS.format(user="new.user_id"),
+    ),
+    "trg_daily_progress_version_update": (
+        "AFTER UPDATE ON daily_progress",
+        _BUMP_PROGRESS.format(user="new.user_id"),
+    ),
+    "trg_daily_progress_version_delete": (
+        "AFTER DELETE ON daily_progress",
+        _BUMP_PROGRESS.format(user="old.user_id"),
+    ),
+    # Remove cards before their word, while the word's level can still be
+    # read by trg_user_cards_stats_delete
+    "trg_vocabulary_cards_delete": (
+        "BEFORE DELETE ON vocabulary",
+        "DELETE FROM user_cards WHERE word_id = old.id;",
+    ),
+}
+
+
+# Keep the vocabulary_fts full-text index in step with vocabulary. Only
+# created when SQLite has FTS5; updates that touch just the scheduling
+# columns don't fire them.
+_FTS_COLUMNS = "word, translation, example_sentence"
+
+FTS_TRIGGERS = {
+    "trg_vocabulary_fts_insert": (
+        "AFTER INSERT ON vocabulary",
+        f"""INSERT INTO vocabulary_fts (rowid, {_FTS_COLUMNS})
+            VALUES (new.id, new.word, new.translation, new.example_sentence);""",
+    ),
+    "trg_vocabulary_fts_delete": (
+        "AFTER DELETE ON vocabulary",
+        f"""INSERT INTO vocabulary_fts (vocabulary_fts, rowid, {_FTS_COLUMNS})
+            VALUES ('delete', old.id, old.word, old.translation, old.example_sentence);""",
+    ),
+    "trg_vocabulary_fts_update": (
+        f"AFTER UPDATE OF {_FTS_COLUMNS} ON vocabulary",
+        f"""INSERT INTO vocabulary_fts (vocabulary_fts, rowid, {_FTS_COLUMNS})
+            VALUES ('delete', old.id, old.word, old.translation, old.example_sentence);
+            INSERT INTO vocabulary_fts (rowid, {_FTS_COLUMNS})
+            VALUES (new.id, new.word, new.translation, new.example_sentence);""",
+    ),
+}
+
+
+# =============================
+# Connection Manager
+# =============================
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+# Bumped by close_all() so other threads drop their stale connections
+_generation = 0
+
+# Optional profiling.QueryTracer that every new connection reports to
+_tracer = None
+
+
+def configure(db_path=None, pragmas=None, timeout=None):
+    """
+    Change the database location or connection pragmas.
+
+    Open connections are closed so the next get_connection() call
+    picks up the new settings.
+    """
+    global DB_PATH, BUSY_TIMEOUT
+
+    close_all()
+
+    if db_path is not None:
+        DB_PATH = Path(db_path)
+    if pragmas:
+        PRAGMAS.update(pragmas)
+    if timeout is not None:
+        BUSY_TIMEOUT = timeout
+
+
+def set_tracer(tracer):
+    """
+    Report every statement to `tracer` (a profiling.QueryTracer), or stop
+    tracing with None. Open connections are closed so the next
+    get_connection() call opens a traced one.
+    """
+    global _tracer
+
+    close_all()
+    _tracer = tracer
+
+
+def normalize_word(word):
+    """
+    The key words are deduplicated by: Unicode (NFKC) and case folded, with
+    whitespace collapsed, so "Ice  cream" and "ice cream" are one word.
+    Also registered on every connection as the normalize_word() SQL
+    function, for migrations and `dedupe`.
+    """
+    if word is None:
+        return None
+    return " ".join(unicodedata.normalize("NFKC", word).casefold().split())
+
+
+def _connect():
+    """Open and configure a new SQLite connection."""
     try:
-        # Ensure data directory exists before connecting
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        # Ensure database directory exists before connecting
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-        conn = sqlite3.connect(str(DB_PATH), timeout=10.0)
+        conn = sqlite3.connect(
+            str(DB_PATH),
+            timeout=BUSY_TIMEOUT,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,
+            factory=_tracer.connection_factory if _tracer else sqlite3.Connection,
+        )
+        if _tracer:
+            _tracer.install(conn)
         conn.row_factory = sqlite3.Row  # Allows dict-like row access
-        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.create_function("normalize_word", 1, normalize_word, deterministic=True)
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value};")
         return conn
     except Exception as e:
         print(f"Error connecting to database: {e}", file=sys.stderr)
         raise
 
 
+def get_connection():
+    """
+    Return the shared SQLite connection for the current thread.
+
+    The connection is opened on first use and kept for the life of the
+    process, so callers must not close it.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.generation != _generation:
+        conn = _connect()
+        _local.conn = conn
+        _local.generation = _generation
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+def plain_cursor():
+    """
+    Return a cursor on the thread's connection that yields plain tuples,
+    for bulk reads where building sqlite3.Row objects would dominate.
+    """
+    cursor = get_connection().cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+@contextmanager
+def transaction(immediate: bool = False):
+    """
+    Run a block inside a transaction on the shared connection.
+
+    Commits on success and rolls back on error. Nested blocks join the
+    outermost transaction instead of committing early. With `immediate`,
+    the outermost block starts with BEGIN IMMEDIATE, taking the write lock
+    up front so a read-modify-write can't be interleaved with another
+    process's write.
+    """
+    conn = get_connection()
+    depth = getattr(_local, "depth", 0)
+    if immediate and depth == 0 and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    _local.depth = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            conn.commit()
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+            _local.after_commit = []
+        raise
+    finally:
+        _local.depth = depth
+
+    if depth == 0:
+        callbacks, _local.after_commit = getattr(_local, "after_commit", []), []
+        for callback in callbacks:
+            callback()
+
+
+def after_commit(callback):
+    """
+    Call `callback` once the current transaction commits, or right away
+    outside a transaction. Dropped if the transaction rolls back.
+    """
+    if getattr(_local, "depth", 0) == 0:
+        callback()
+    else:
+        _local.__dict__.setdefault("after_commit", []).append(callback)
+
+
+def is_busy_error(error):
+    """Return True if an error means another connection holds the lock"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+def retry_on_busy(func):
+    """
+    Retry a write function when the database stays locked.
+
+    Only the outermost call retries; inside another transaction the error
+    is re-raised so the whole transaction is rolled back and retried.
+    Functions wrapped with this must be safe to re-run after a rollback.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                nested = getattr(_local, "depth", 0) > 0
+                if nested or not is_busy_error(e) or attempt == RETRY_ATTEMPTS - 1:
+                    raise
+                time.sleep(RETRY_DELAY * (2 ** attempt) * (1 + random.random()))
+
+    return wrapper
+
+
+def close_connection():
+    """Close the current thread's connection, if one is open."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    with _connections_lock:
+        if conn in _connections:
+            _connections.remove(conn)
+    conn.close()
+
+
+def close_all():
+    """Close every connection opened by this process."""
+    global _generation
+
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+    _local.conn = None
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(close_all)
+
+
 # =============================
 # Database Initialization
 # =============================
@@ -38,14 +430,17 @@ def get_connection():
 def init_db():
     """
     Initialize database and ensure all tables and columns exist.
+
+    This is a single PRAGMA read when the schema is already at
+    SCHEMA_VERSION, so it is cheap to call on every start-up.
     """
     try:
-        # Ensure directory exists
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-
         conn = get_connection()
         cursor = conn.cursor()
 
+        if schema_version(cursor) >= SCHEMA_VERSION:
+            return
+
         # -----------------------------
         # Vocabulary Table
         # -----------------------------
@@ -55,12 +450,40 @@ def init_db():
                 word TEXT NOT NULL,
                 translation TEXT,
                 example_sentence TEXT,
-                level TEXT,
+                level TEXT
+            );
+        """)
+
+        # -----------------------------
+        # Users Table
+        # -----------------------------
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                created_at TEXT
+            );
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO users (id, name, created_at)
+            VALUES (?, ?, date('now'));
+        """, (DEFAULT_USER_ID, DEFAULT_USER))
+
+        # -----------------------------
+        # User Cards Table (per-learner scheduling state for a shared word)
+        # -----------------------------
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_cards (
+                user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                word_id INTEGER NOT NULL REFERENCES vocabulary (id) ON DELETE CASCADE,
                 next_review TEXT,
                 interval INTEGER DEFAULT 0,
                 ease_factor REAL DEFAULT 2.5,
-                repetitions INTEGER DEFAULT 0
-            );
+                repetitions INTEGER DEFAULT 0,
+                lapses INTEGER NOT NULL DEFAULT 0,
+                suspended INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, word_id)
+            ) WITHOUT ROWID;
         """)
 
         # -----------------------------
@@ -69,6 +492,7 @@ def init_db():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS grammar_topics (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL DEFAULT 1,
                 name TEXT NOT NULL,
                 description TEXT,
                 difficulty TEXT,
@@ -82,6 +506,7 @@ def init_db():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS writing_practice (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL DEFAULT 1,
                 date TEXT NOT NULL,
                 topic TEXT,
                 text TEXT NOT NULL,
@@ -109,6 +534,7 @@ def init_db():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS daily_progress (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL DEFAULT 1,
                 date TEXT NOT NULL,
                 words_reviewed INTEGER DEFAULT 0,
                 words_correct INTEGER DEFAULT 0,
@@ -119,6 +545,61 @@ def init_db():
             );
         """)
 
+        # -----------------------------
+        # Progress Versions Table (bumped by TRIGGERS on every progress write)
+        # -----------------------------
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS progress_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+        # -----------------------------
+        # Review Log Table (append-only, one row per answer)
+        # -----------------------------
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS review_log (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL DEFAULT 1,
+                word_id INTEGER NOT NULL,
+                reviewed_at INTEGER NOT NULL,
+                grade INTEGER NOT NULL,
+                latency_ms INTEGER,
+                old_interval INTEGER,
+                new_interval INTEGER
+            );
+        """)
+
+        # -----------------------------
+        # Materialized Stats Tables (maintained by TRIGGERS)
+        # -----------------------------
+        # Derived data: dropped and rebuilt by rebuild_stats() on migration
+        cursor.execute("DROP TABLE IF EXISTS deck_stats;")
+        cursor.execute("""
+            CREATE TABLE deck_stats (
+                user_id INTEGER NOT NULL,
+                level TEXT NOT NULL,
+                cards INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, level)
+            ) WITHOUT ROWID;
+        """)
+
+        cursor.execute("DROP TABLE IF EXISTS due_counts;")
+        cursor.execute("""
+            CREATE TABLE due_counts (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                cards INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID;
+        """)
+
+        # -----------------------------
+        # Full-Text Search Index (optional, needs FTS5)
+        # -----------------------------
+        fts = ensure_fts(cursor)
+
         # Commit table creation first
         conn.commit()
 
@@ -127,10 +608,27 @@ def init_db():
         # -----------------------------
         ensure_column(cursor, "daily_progress", "accuracy", "REAL DEFAULT 0")
         ensure_column(cursor, "daily_progress", "session_duration", "INTEGER DEFAULT 0")
+        ensure_column(cursor, "daily_progress", "user_id", "INTEGER NOT NULL DEFAULT 1")
+        ensure_column(cursor, "review_log", "user_id", "INTEGER NOT NULL DEFAULT 1")
+        ensure_column(cursor, "writing_practice", "user_id", "INTEGER NOT NULL DEFAULT 1")
+        ensure_column(cursor, "grammar_topics", "user_id", "INTEGER NOT NULL DEFAULT 1")
+        ensure_column(cursor, "user_cards", "lapses", "INTEGER NOT NULL DEFAULT 0")
+        ensure_column(cursor, "user_cards", "suspended", "INTEGER NOT NULL DEFAULT 0")
+        ensure_column(cursor, "vocabulary", "word_key", "TEXT")
+        migrate_vocabulary_schedule(cursor)
+        migrate_word_keys(cursor)
 
         # Commit migrations
         conn.commit()
-        conn.close()
+
+        ensure_indexes(cursor)
+        ensure_triggers(cursor, fts)
+        rebuild_stats(cursor)
+        if fts:
+            cursor.execute("INSERT INTO vocabulary_fts (vocabulary_fts) VALUES ('rebuild');")
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+        conn.commit()
 
     except Exception as e:
         print(f"Error initializing database: {e}", file=sys.stderr)
@@ -157,3 +655,164 @@ def ensure_column(cursor, table_name, column_name, column_definition):
     except Exception as e:
         # Column might already exist, that's okay
         pass
+
+
+def migrate_vocabulary_schedule(cursor):
+    """
+    Move scheduling columns from vocabulary (single-learner databases)
+    into user_cards for the default user, then drop them where SQLite
+    supports DROP COLUMN (3.35+). Older SQLite keeps the unused columns.
+    """
+    cursor.execute("PRAGMA table_info(vocabulary);")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "next_review" not in columns:
+        return
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO user_cards
+            (user_id, word_id, next_review, interval, ease_factor, repetitions)
+        SELECT ?, id, next_review, interval, ease_factor, repetitions
+        FROM vocabulary
+    """, (DEFAULT_USER_ID,))
+
+    # Old triggers and indexes reference the columns being dropped;
+    # ensure_indexes() and ensure_triggers() recreate the current set
+    cursor.execute("""
+        SELECT type, name FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND tbl_name = 'vocabulary'
+          AND name NOT LIKE 'sqlite_%'
+    """)
+    for kind, name in cursor.fetchall():
+        cursor.execute(f"DROP {kind.upper()} IF EXISTS {name};")
+
+    for column in ("next_review", "interval", "ease_factor", "repetitions"):
+        try:
+            cursor.execute(f"ALTER TABLE vocabulary DROP COLUMN {column};")
+        except sqlite3.OperationalError:
+            break
+
+
+def migrate_word_keys(cursor):
+    """
+    Fill in word_key for words added before it existed. The unique index
+    is built first, so where older versions left several rows with one
+    key only the oldest gets it (UPDATE OR IGNORE walks rows in id
+    order); `dedupe` merges the others.
+    """
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_vocabulary_word_key ON vocabulary (word_key);
+    """)
+    cursor.execute("""
+        UPDATE OR IGNORE vocabulary SET word_key = normalize_word(word) WHERE word_key IS NULL;
+    """)
+
+
+def schema_version(cursor):
+    """
+    Return the schema version recorded in the database.
+    """
+    cursor.execute("PRAGMA user_version;")
+    return cursor.fetchone()[0]
+
+
+def ensure_indexes(cursor):
+    """
+    Create the indexes in INDEXES and drop stale ones from older versions.
+    """
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'
+    """)
+    for (name,) in cursor.fetchall():
+        if name not in INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name};")
+
+    for name, target in INDEXES.items():
+        kind = "UNIQUE INDEX" if target.startswith("UNIQUE ") else "INDEX"
+        target = target[len("UNIQUE "):] if kind == "UNIQUE INDEX" else target
+        cursor.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {target};")
+
+
+def ensure_fts(cursor):
+    """
+    Create the vocabulary_fts table if SQLite was built with FTS5.
+
+    Returns True if the table exists afterwards.
+    """
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS vocabulary_fts USING fts5(
+                {_FTS_COLUMNS},
+                content='vocabulary',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            );
+        """)
+        return True
+    except sqlite3.OperationalError:
+        # No FTS5 module; Vocabulary.search() falls back to LIKE
+        return False
+
+
+def has_fts(cursor=None):
+    """Return True if the vocabulary_fts index exists"""
+    cursor = cursor or get_connection().cursor()
+    cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vocabulary_fts'
+    """)
+    return cursor.fetchone() is not None
+
+
+def ensure_triggers(cursor, fts=False):
+    """
+    Recreate the triggers in TRIGGERS (plus FTS_TRIGGERS when `fts` is set)
+    and drop stale ones from older versions.
+    """
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'trigger' AND name LIKE 'trg\\_%' ESCAPE '\\'
+    """)
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+    triggers = dict(TRIGGERS)
+    if fts:
+        triggers.update(FTS_TRIGGERS)
+
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END;")
+
+
+def rebuild_stats(cursor):
+    """
+    Recount deck_stats and due_counts from user_cards in one pass each.
+
+    Triggers keep them current afterwards; this only runs on migration.
+    """
+    cursor.execute("DELETE FROM deck_stats;")
+    cursor.execute("""
+        INSERT INTO deck_stats (user_id, level, cards)
+        SELECT c.user_id, COALESCE(v.level, ''), COUNT(*)
+        FROM user_cards c JOIN vocabulary v ON v.id = c.word_id
+        GROUP BY 1, 2;
+    """)
+
+    cursor.execute("DELETE FROM due_counts;")
+    cursor.execute("""
+        INSERT INTO due_counts (user_id, day, cards)
+        SELECT user_id, COALESCE(next_review, ''), COUNT(*)
+        FROM user_cards
+        GROUP BY 1, 2;
+    """)
+
+
+def query_plan(sql, params=()):
+    """
+    Return the EXPLAIN QUERY PLAN details for a statement.
+
+    Handy for checking that a query searches an index rather than
+    scanning a table, e.g. no detail starts with "SCAN vocabulary".
+    """
+    cursor = get_connection().execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[3] for row in cursor.fetchall()]
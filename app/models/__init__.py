@@ -1,4 +1,22 @@
 # Models package
-from .vocabulary import Vocabulary
+#
+# Models are imported on first access (PEP 562), so importing one model
+# module doesn't load the rest.
+import importlib
 
-__all__ = ['Vocabulary']
+_MODULES = {
+    'Vocabulary': '.vocabulary',
+    'LEVELS': '.vocabulary',
+    'ReviewLog': '.review_log',
+    'User': '.user',
+    'WritingPractice': '.practice',
+    'GrammarTopic': '.grammar',
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_MODULES[name], __name__), name)
@@ -0,0 +1,69 @@
+from app.database import DEFAULT_USER_ID, get_connection, transaction
+
+
+# Weight of the latest session in the running mastery score (0-100)
+MASTERY_WEIGHT = 0.3
+
+
+class GrammarTopic:
+    """
+    Model for a learner's grammar topics and their mastery scores.
+
+    A topic row is created the first time the learner practices it;
+    the exercises themselves live in the packed exercise bank.
+    """
+
+    @staticmethod
+    def get_mastery(user_id: int = DEFAULT_USER_ID):
+        """Return {topic name: (difficulty, mastery_score)} for a learner"""
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            SELECT name, difficulty, mastery_score
+            FROM grammar_topics
+            WHERE user_id = ?
+        """, (user_id,))
+        return {name: (difficulty, score) for name, difficulty, score in cursor.fetchall()}
+
+    @staticmethod
+    def record_results(results, user_id: int = DEFAULT_USER_ID):
+        """
+        Fold a session's results into the learner's mastery scores.
+
+        `results` maps a topic name to (difficulty, correct, total), with
+        difficulty None when the session mixed levels (the stored one is
+        then kept). Every topic is updated in one transaction with two
+        executemany() calls, however many topics the session covered. The
+        new score moves MASTERY_WEIGHT of the way towards the session's
+        accuracy.
+        """
+        scores = {
+            name: (difficulty, correct * 100.0 / total)
+            for name, (difficulty, correct, total) in results.items() if total
+        }
+        if not scores:
+            return
+
+        with transaction(immediate=True) as conn:
+            existing = {
+                name for (name,) in conn.execute(
+                    "SELECT name FROM grammar_topics WHERE user_id = ?", (user_id,)
+                )
+            }
+
+            conn.executemany("""
+                UPDATE grammar_topics
+                SET difficulty = COALESCE(?, difficulty),
+                    mastery_score = CAST(ROUND(mastery_score * ? + ? * ?) AS INTEGER)
+                WHERE user_id = ? AND name = ?
+            """, (
+                (difficulty, 1 - MASTERY_WEIGHT, accuracy, MASTERY_WEIGHT, user_id, name)
+                for name, (difficulty, accuracy) in scores.items() if name in existing
+            ))
+
+            conn.executemany("""
+                INSERT INTO grammar_topics (user_id, name, difficulty, mastery_score)
+                VALUES (?, ?, ?, ?)
+            """, (
+                (user_id, name, difficulty, round(accuracy * MASTERY_WEIGHT))
+                for name, (difficulty, accuracy) in scores.items() if name not in existing
+            ))
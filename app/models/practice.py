@@ -0,0 +1,200 @@
+from app import database
+from app.database import DEFAULT_USER_ID, get_connection, plain_cursor, transaction
+from collections import Counter, deque, namedtuple
+from datetime import date
+import re
+
+
+# Words in running text: letters with inner apostrophes ("don't", "o'clock")
+_TOKEN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+# Regular inflections tried when a token isn't a deck word itself, as
+# (suffix, replacement): "studies" -> "study", "making" -> "make", ...
+_INFLECTIONS = (
+    ("ies", "y"), ("ied", "y"), ("es", ""), ("s", ""), ("ed", ""), ("ed", "e"),
+    ("d", ""), ("ing", ""), ("ing", "e"), ("er", ""), ("est", ""), ("ly", ""),
+)
+
+# Deck words listed in the stored feedback
+FEEDBACK_WORDS = 50
+
+
+def tokenize(text: str):
+    """Return the lowercase words in `text`"""
+    return _TOKEN.findall(text.lower())
+
+
+WritingAnalysis = namedtuple("WritingAnalysis", ["text", "word_count", "distinct", "known", "used"])
+WritingAnalysis.__doc__ = """
+Result of analyzing a text against a learner's deck.
+
+`word_count` counts every word and `distinct` the different ones;
+`known` is how many words (with repeats) are deck words. `used` maps
+each deck word found, single words and phrases alike, to its count.
+"""
+
+
+class DeckIndex:
+    """
+    A learner's deck words, normalized for matching running text.
+
+    Single words are kept in a dict for O(1) lookups. Phrases ("give up",
+    "ice cream") are grouped by their last word, so they can be matched
+    against the last few words of a stream as it is read.
+    """
+
+    # (database path, user_id) -> (deck version, DeckIndex)
+    _cache = {}
+
+    def __init__(self, rows):
+        """Build the index from (word_id, word) rows"""
+        self.words = {}
+        self.phrases = {}
+        self.longest = 1
+
+        for word_id, word in rows:
+            tokens = tuple(tokenize(word))
+            if len(tokens) == 1:
+                self.words.setdefault(tokens[0], word)
+            elif tokens:
+                self.phrases.setdefault(tokens[-1], []).append((tokens, word))
+                self.longest = max(self.longest, len(tokens))
+
+    @classmethod
+    def for_user(cls, user_id: int = DEFAULT_USER_ID):
+        """
+        Return the learner's index, building it on first use.
+
+        The index is cached per process and rebuilt only when the deck
+        changes: its card count (from deck_stats) or the newest word id
+        differ from when it was built. Both are single-row reads.
+        """
+        cursor = plain_cursor()
+        cursor.execute("""
+            SELECT (SELECT COALESCE(SUM(cards), 0) FROM deck_stats WHERE user_id = ?),
+                   (SELECT MAX(id) FROM vocabulary)
+        """, (user_id,))
+        version = tuple(cursor.fetchone())
+
+        key = (str(database.DB_PATH), user_id)
+        cached = cls._cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        cursor.execute("""
+            SELECT v.id, v.word
+            FROM user_cards c
+            JOIN vocabulary v ON v.id = c.word_id
+            WHERE c.user_id = ?
+        """, (user_id,))
+        index = cls(cursor)
+        cls._cache[key] = (version, index)
+        return index
+
+    def lookup(self, token: str):
+        """Return the deck word `token` is, or is a regular inflection of"""
+        word = self.words.get(token)
+        if word is not None:
+            return word
+
+        for suffix, replacement in _INFLECTIONS:
+            if token.endswith(suffix) and len(token) > len(suffix) + 2:
+                word = self.words.get(token[:-len(suffix)] + replacement)
+                if word is not None:
+                    return word
+        return None
+
+
+class WritingPractice:
+    """Model for writing practice: analyze texts and keep a history"""
+
+    @staticmethod
+    def analyze(lines, user_id: int = DEFAULT_USER_ID):
+        """
+        Analyze a text, given as an iterable of lines (e.g. an open file).
+
+        The text is tokenized in one streaming pass; each word is looked
+        up in the learner's cached DeckIndex once, however often it
+        repeats. Returns a WritingAnalysis.
+        """
+        index = DeckIndex.for_user(user_id)
+        words = {}  # token -> deck word or None, so each is looked up once
+        used = Counter()
+        recent = deque(maxlen=index.longest)
+        parts = []
+        word_count = known = 0
+
+        for line in lines:
+            parts.append(line)
+            for token in tokenize(line):
+                word_count += 1
+                recent.append(token)
+
+                if token not in words:
+                    words[token] = index.lookup(token)
+                word = words[token]
+                if word is not None:
+                    known += 1
+                    used[word] += 1
+
+                for tokens, phrase in index.phrases.get(token, ()):
+                    if len(tokens) <= len(recent) and tuple(recent)[-len(tokens):] == tokens:
+                        used[phrase] += 1
+
+        return WritingAnalysis("".join(parts), word_count, len(words), known, dict(used))
+
+    @staticmethod
+    def feedback(analysis: WritingAnalysis):
+        """Short summary of an analysis, as stored with the text"""
+        if not analysis.word_count:
+            return "No words found."
+
+        coverage = analysis.known / analysis.word_count * 100
+        top = sorted(analysis.used.items(), key=lambda item: (-item[1], item[0]))
+        words = ", ".join(word for word, _ in top[:FEEDBACK_WORDS])
+        if len(top) > FEEDBACK_WORDS:
+            words += f", ... ({len(top) - FEEDBACK_WORDS} more)"
+
+        return (f"{analysis.word_count} words, {analysis.distinct} distinct; "
+                f"{coverage:.1f}% deck vocabulary. "
+                f"Deck words used ({len(top)}): {words or 'none'}")
+
+    @staticmethod
+    def save(analysis: WritingAnalysis, topic: str = None, user_id: int = DEFAULT_USER_ID):
+        """
+        Store a text with its word count and feedback, and add its words to
+        today's words_written. Returns the new entry's id.
+        """
+        today = date.today().strftime("%Y-%m-%d")
+
+        with transaction(immediate=True) as conn:
+            cursor = conn.execute("""
+                INSERT INTO writing_practice (user_id, date, topic, text, word_count, feedback)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, today, topic, analysis.text, analysis.word_count,
+                  WritingPractice.feedback(analysis)))
+            entry_id = cursor.lastrowid
+
+            updated = conn.execute("""
+                UPDATE daily_progress SET words_written = words_written + ?
+                WHERE user_id = ? AND date = ?
+            """, (analysis.word_count, user_id, today)).rowcount
+            if not updated:
+                conn.execute("""
+                    INSERT INTO daily_progress (user_id, date, words_written) VALUES (?, ?, ?)
+                """, (user_id, today, analysis.word_count))
+
+        return entry_id
+
+    @staticmethod
+    def history(limit: int = 10, user_id: int = DEFAULT_USER_ID):
+        """Return a learner's latest (id, date, topic, word_count) entries"""
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            SELECT id, date, topic, word_count
+            FROM writing_practice
+            WHERE user_id = ?
+            ORDER BY date DESC, id DESC
+            LIMIT ?
+        """, (user_id, limit))
+        return cursor.fetchall()
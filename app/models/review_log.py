@@ -0,0 +1,68 @@
+from app.database import DEFAULT_USER_ID, get_connection, transaction
+import time
+
+
+class ReviewLog:
+    """
+    Append-only log of every answer.
+
+    Each event is a (word_id, reviewed_at, grade, latency_ms, old_interval,
+    new_interval) tuple, logged under the learner who answered.
+    `reviewed_at` is a Unix timestamp in seconds and `latency_ms` may be
+    None when the answer wasn't timed.
+    """
+
+    @staticmethod
+    def event(word_id: int, grade: int, old_interval: int, new_interval: int,
+              latency_ms: int = None, reviewed_at: int = None):
+        """Build an event tuple, stamped with the current time by default"""
+        if reviewed_at is None:
+            reviewed_at = int(time.time())
+        return (word_id, reviewed_at, grade, latency_ms, old_interval, new_interval)
+
+    @staticmethod
+    def append(events, user_id: int = DEFAULT_USER_ID):
+        """Write a batch of one learner's events in one transaction"""
+        with transaction() as conn:
+            conn.executemany("""
+                INSERT INTO review_log
+                (user_id, word_id, reviewed_at, grade, latency_ms, old_interval, new_interval)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, ((user_id,) + tuple(event) for event in events))
+
+    @staticmethod
+    def iter_events(since: int = None, until: int = None, word_id: int = None,
+                    batch_size: int = 1000, user_id: int = DEFAULT_USER_ID):
+        """
+        Yield a learner's events in time order, optionally for one word or a
+        time window.
+
+        Rows are fetched `batch_size` at a time, so scanning millions of
+        events keeps memory flat.
+        """
+        filters = ["user_id = ?"]
+        params = [user_id]
+        if word_id is not None:
+            filters.append("word_id = ?")
+            params.append(word_id)
+        if since is not None:
+            filters.append("reviewed_at >= ?")
+            params.append(since)
+        if until is not None:
+            filters.append("reviewed_at < ?")
+            params.append(until)
+
+        cursor = get_connection().cursor()
+        cursor.execute(f"""
+            SELECT word_id, reviewed_at, grade, latency_ms, old_interval, new_interval
+            FROM review_log
+            WHERE {" AND ".join(filters)}
+            ORDER BY reviewed_at, id
+        """, params)
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield tuple(row)
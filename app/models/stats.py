@@ -0,0 +1,93 @@
+from app.database import DEFAULT_USER_ID, get_connection
+from datetime import date, timedelta
+
+
+# Answers over a date range (user_id, first day, last day)
+_ACCURACY = """
+    SELECT COALESCE(SUM(words_reviewed), 0), COALESCE(SUM(words_correct), 0)
+    FROM daily_progress
+    WHERE user_id = ? AND date BETWEEN ? AND ?
+"""
+
+class Stats:
+    """
+    Read-only statistics backed by the materialized deck_stats and
+    due_counts tables and the date index on daily_progress. None of these
+    queries scan a deck. Every method reports on one learner.
+    """
+
+    @staticmethod
+    def deck_summary(today: date = None, user_id: int = DEFAULT_USER_ID):
+        """
+        Return total cards, cards per level and due counts.
+
+        `due_today` includes overdue cards; `due_week` covers the next
+        seven days including today.
+        """
+        today = today or date.today()
+        cursor = get_connection().cursor()
+
+        cursor.execute("""
+            SELECT level, cards FROM deck_stats WHERE user_id = ? ORDER BY level = '', level
+        """, (user_id,))
+        levels = {level or None: cards for level, cards in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(CASE WHEN day <= ?1 THEN cards END), 0),
+                COALESCE(SUM(cards), 0)
+            FROM due_counts
+            WHERE user_id = ?3 AND day != '' AND day <= ?2
+        """, (today.strftime("%Y-%m-%d"), (today + timedelta(days=6)).strftime("%Y-%m-%d"), user_id))
+        due_today, due_week = cursor.fetchone()
+
+        return {
+            'total': sum(levels.values()),
+            'levels': levels,
+            'due_today': due_today,
+            'due_week': due_week
+        }
+
+    @staticmethod
+    def get_day(day: date = None, user_id: int = DEFAULT_USER_ID):
+        """Return today's (or `day`'s) daily_progress row, or None"""
+        day = day or date.today()
+        cursor = get_connection().cursor()
+
+        cursor.execute("""
+            SELECT words_reviewed, words_correct, accuracy, session_duration
+            FROM daily_progress
+            WHERE user_id = ? AND date = ?
+        """, (user_id, day.strftime("%Y-%m-%d")))
+
+        return cursor.fetchone()
+
+    @staticmethod
+    def accuracy(days: int, today: date = None, user_id: int = DEFAULT_USER_ID):
+        """
+        Return (reviewed, correct, accuracy %) over the last `days` days,
+        including today.
+        """
+        today = today or date.today()
+        start = today - timedelta(days=days - 1)
+        cursor = get_connection().cursor()
+
+        cursor.execute(_ACCURACY, (user_id, start.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")))
+
+        reviewed, correct = cursor.fetchone()
+        accuracy = (correct / reviewed) * 100 if reviewed else 0
+        return reviewed, correct, accuracy
+
+    @staticmethod
+    def daily(start: date, end: date, user_id: int = DEFAULT_USER_ID):
+        """Return daily_progress rows between two dates (inclusive), oldest first"""
+        cursor = get_connection().cursor()
+
+        cursor.execute("""
+            SELECT date, words_reviewed, words_correct, session_duration
+            FROM daily_progress
+            WHERE user_id = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        """, (user_id, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")))
+
+        return cursor.fetchall()
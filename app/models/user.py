@@ -0,0 +1,39 @@
+from app.database import DEFAULT_USER, DEFAULT_USER_ID, get_connection, transaction
+
+
+class User:
+    """Model for learner profiles"""
+
+    @staticmethod
+    def get_or_create(name: str = None):
+        """Return the id of the named learner, creating the profile if needed"""
+        if not name or name == DEFAULT_USER:
+            return DEFAULT_USER_ID
+
+        cursor = get_connection().cursor()
+        cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        with transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO users (name, created_at) VALUES (?, date('now'))
+                ON CONFLICT (name) DO NOTHING
+            """, (name,))
+            if cursor.rowcount:
+                return cursor.lastrowid
+            return conn.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()[0]
+
+    @staticmethod
+    def get_all():
+        """Return (id, name, cards, created_at) for every learner"""
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            SELECT u.id, u.name,
+                   (SELECT COALESCE(SUM(cards), 0) FROM deck_stats WHERE user_id = u.id),
+                   u.created_at
+            FROM users u
+            ORDER BY u.id
+        """)
+        return cursor.fetchall()
@@ -1,120 +1,471 @@
-from app.database import get_connection
+from app.database import (
+    DEFAULT_USER_ID, get_connection, has_fts, normalize_word, plain_cursor, transaction,
+)
 from datetime import datetime
+import random
+import re
+
+
+# Valid values for the optional `level` column
+LEVELS = ("beginner", "intermediate", "advanced")
+
+# Random id probes get_random_word() tries before falling back to an offset
+RANDOM_PROBES = 32
+
+# Full-text ranking weights for word, translation and example_sentence
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Add a word, or fill in the shared word with the same normalized spelling
+# (?5, from database.normalize_word). Words are shared by every learner,
+# so only columns that are still empty are filled; stored translations,
+# examples and levels are never overwritten. Rows that wouldn't change
+# aren't rewritten, so re-importing a file doesn't touch the FTS index.
+_UPSERT_WORD = """
+    INSERT INTO vocabulary (word, word_key, translation, example_sentence, level)
+    VALUES (?1, ?5, ?2, ?3, ?4)
+    ON CONFLICT (word_key) DO UPDATE SET
+        translation = COALESCE(translation, excluded.translation),
+        example_sentence = COALESCE(example_sentence, excluded.example_sentence),
+        level = COALESCE(level, excluded.level)
+    WHERE (translation IS NULL AND excluded.translation IS NOT NULL)
+       OR (example_sentence IS NULL AND excluded.example_sentence IS NOT NULL)
+       OR (level IS NULL AND excluded.level IS NOT NULL)
+"""
+
+# Give a learner a card for a word unless they already have one
+_ADD_CARD = """
+    INSERT OR IGNORE INTO user_cards (user_id, word_id, next_review)
+    SELECT ?, id, ? FROM vocabulary WHERE word_key = ?
+"""
+
+
+def word_page_sql(by_word: bool, level: bool = False, due: bool = False, after: bool = False):
+    """
+    The statement for one page of Vocabulary.iter_words(). Parameters are
+    user_id, then the level and today's date when filtered on, then the
+    last (word, id) when `after`, then LIMIT and OFFSET. With `by_word`
+    the word index drives the join, otherwise the learner's cards do.
+    """
+    if by_word:
+        tables = "vocabulary v CROSS JOIN user_cards c ON c.word_id = v.id"
+    else:
+        tables = "user_cards c CROSS JOIN vocabulary v ON v.id = c.word_id"
+
+    filters = ["c.user_id = ?"]
+    if level:
+        filters.append("v.level = ?")
+    if due:
+        filters.append("c.next_review <= ?")
+    if after:
+        filters.append("(v.word, v.id) > (?, ?)")
+
+    return f"""
+        SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+               c.interval, c.repetitions
+        FROM {tables}
+        WHERE {" AND ".join(filters)}
+        ORDER BY v.word, v.id
+        LIMIT ? OFFSET ?
+    """
 
 
 class Vocabulary:
-    """Model for managing vocabulary words"""
+    """
+    Model for managing vocabulary words.
+
+    Word content (word, translation, example, level) is shared by every
+    learner; each learner's scheduling state lives in user_cards. Methods
+    that read or change a deck take a `user_id`.
+    """
+
+    @staticmethod
+    def add_word(word: str, translation: str = None, example: str = None, level: str = None,
+                 user_id: int = DEFAULT_USER_ID):
+        """
+        Add a word to the vocabulary and the learner's deck. A word already
+        stored under any spelling of the same key is reused, with only its
+        empty columns filled in, and a card the learner already has keeps
+        its schedule. Returns the word's id.
+        """
+        today = datetime.today().strftime("%Y-%m-%d")
+        key = normalize_word(word)
+
+        with transaction() as conn:
+            conn.execute(_UPSERT_WORD, (word, translation, example, level, key))
+            conn.execute(_ADD_CARD, (user_id, today, key))
+            cursor = conn.execute("SELECT id FROM vocabulary WHERE word_key = ?", (key,))
+            return cursor.fetchone()[0]
 
     @staticmethod
-    def add_word(word: str, translation: str = None, example: str = None, level: str = None):
-        """Add a new word to the vocabulary database"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def add_words(rows, user_id: int = DEFAULT_USER_ID):
+        """
+        Add many words to a learner's deck in one transaction.
 
+        `rows` is a list of (word, translation, example, level) tuples,
+        upserted like add_word(): words already in the shared vocabulary
+        (under any spelling of the same key) are reused, with only their
+        empty columns filled in, and words already in the learner's deck
+        are skipped. Returns the number of cards added to the deck.
+        """
         today = datetime.today().strftime("%Y-%m-%d")
+        keys = [normalize_word(row[0]) for row in rows]
 
-        cursor.execute("""
-            INSERT INTO vocabulary (word, translation, example_sentence, level, next_review)
-            VALUES (?, ?, ?, ?, ?)
-        """, (word, translation, example, level, today))
+        with transaction() as conn:
+            conn.executemany(_UPSERT_WORD, (
+                (word, translation, example, level, key)
+                for (word, translation, example, level), key in zip(rows, keys)
+            ))
+            cursor = conn.executemany(_ADD_CARD, ((user_id, today, key) for key in keys))
+
+        return cursor.rowcount
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def get_all_words(user_id: int = DEFAULT_USER_ID):
+        """Retrieve all words in a learner's deck"""
+        return list(Vocabulary.iter_words(user_id=user_id))
 
     @staticmethod
-    def get_all_words():
-        """Retrieve all words from the database"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def iter_words(level: str = None, due: bool = False, limit: int = None,
+                   offset: int = 0, page_size: int = 500, user_id: int = DEFAULT_USER_ID):
+        """
+        Yield a learner's words ordered by (word, id), one page at a time.
+
+        Pages are fetched with keyset pagination on (word, id), so each
+        page is an index range search and memory stays flat however large
+        the vocabulary is. `offset` skips rows before the first page only.
+
+        The join order is chosen from the deck's size. A large deck walks
+        the words in index order and checks each against the learner's
+        cards by primary key, about page_size * words / deck rows a page;
+        left to itself SQLite would sort the whole deck for every page. A
+        small deck is read from user_cards and sorted, which is cheaper
+        than walking a vocabulary it barely covers.
+        """
+        cursor = get_connection().cursor()
 
         cursor.execute("""
-            SELECT id, word, translation, example_sentence, level, next_review,
-                   interval, repetitions
-            FROM vocabulary
-            ORDER BY word
-        """)
+            SELECT (SELECT COALESCE(SUM(cards), 0) FROM deck_stats WHERE user_id = ?),
+                   (SELECT COALESCE(MAX(id), 0) FROM vocabulary)
+        """, (user_id,))
+        deck, words = cursor.fetchone()
+        by_word = deck * deck >= page_size * words
+
+        params = [user_id]
+        if level:
+            params.append(level)
+        if due:
+            params.append(datetime.today().strftime("%Y-%m-%d"))
+
+        remaining = limit
+        last = None
 
-        words = cursor.fetchall()
-        conn.close()
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page_params = params + list(last or ()) + [size, offset if last is None else 0]
 
-        return words
+            cursor.execute(
+                word_page_sql(by_word, level=bool(level), due=due, after=last is not None),
+                page_params
+            )
+
+            rows = cursor.fetchall()
+            if not rows:
+                return
+
+            yield from rows
+
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < size:
+                return
+            last = (rows[-1][1], rows[-1][0])
 
     @staticmethod
-    def get_word_by_id(word_id: int):
-        """Get a specific word by its ID"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def get_word_by_id(word_id: int, user_id: int = DEFAULT_USER_ID):
+        """
+        Get a specific word by its ID, with the learner's scheduling state
+        (NULL if the word isn't in their deck)
+        """
+        cursor = get_connection().cursor()
 
         cursor.execute("""
-            SELECT id, word, translation, example_sentence, level, next_review,
-                   interval, ease_factor, repetitions
-            FROM vocabulary
-            WHERE id = ?
-        """, (word_id,))
-
-        word = cursor.fetchone()
-        conn.close()
+            SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+                   c.interval, c.ease_factor, c.repetitions
+            FROM vocabulary v
+            LEFT JOIN user_cards c ON c.word_id = v.id AND c.user_id = ?
+            WHERE v.id = ?
+        """, (user_id, word_id))
 
-        return word
+        return cursor.fetchone()
 
     @staticmethod
-    def get_random_word():
-        """Get a random word for practice"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def get_random_word(level: str = None, due: bool = False, user_id: int = DEFAULT_USER_ID):
+        """
+        Get a random word from a learner's deck, uniformly among matches.
 
+        Probes random word ids between the deck's lowest and highest, which
+        are primary-key lookups, and returns the first hit. Rejection
+        sampling keeps every matching word equally likely. If the probes
+        keep missing (very sparse ids or a rare filter) it falls back to a
+        random offset into the matching cards, which walks an index but
+        never sorts the deck.
+        """
+        cursor = get_connection().cursor()
+
+        filters = []
+        params = []
+        if level:
+            filters.append("v.level = ?")
+            params.append(level)
+        if due:
+            filters.append("c.next_review <= ?")
+            params.append(datetime.today().strftime("%Y-%m-%d"))
+
+        # Separate subqueries so each is a single index seek; a combined
+        # MIN(), MAX() aggregate scans the whole deck
         cursor.execute("""
-            SELECT id, word, translation, example_sentence, level, next_review,
-                   interval, ease_factor, repetitions
-            FROM vocabulary
-            ORDER BY RANDOM()
-            LIMIT 1
-        """)
+            SELECT (SELECT MIN(word_id) FROM user_cards WHERE user_id = ?1),
+                   (SELECT MAX(word_id) FROM user_cards WHERE user_id = ?1)
+        """, (user_id,))
+        low, high = cursor.fetchone()
+        if low is None:
+            return None
 
-        word = cursor.fetchone()
-        conn.close()
+        select = """
+            SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+                   c.interval, c.ease_factor, c.repetitions
+            FROM user_cards c
+            JOIN vocabulary v ON v.id = c.word_id
+        """
+        probe_sql = f"""
+            {select}
+            WHERE {" AND ".join(["c.user_id = ?", "c.word_id = ?"] + filters)}
+        """
+        for _ in range(RANDOM_PROBES):
+            cursor.execute(probe_sql, [user_id, random.randint(low, high)] + params)
+            word = cursor.fetchone()
+            if word:
+                return word
 
-        return word
+        where = f"WHERE {' AND '.join(['c.user_id = ?'] + filters)}"
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM user_cards c JOIN vocabulary v ON v.id = c.word_id {where}
+        """, [user_id] + params)
+        count = cursor.fetchone()[0]
+        if not count:
+            return None
+
+        cursor.execute(f"""
+            {select} {where} LIMIT 1 OFFSET ?
+        """, [user_id] + params + [random.randrange(count)])
+
+        return cursor.fetchone()
+
+    @staticmethod
+    def search(query: str, limit: int = 20, user_id: int = DEFAULT_USER_ID):
+        """
+        Search a learner's words, translations and examples, best matches first.
+
+        Every term in `query` must match the start of a word somewhere in
+        the entry ("hel wor" finds "hello world"). Uses the FTS5 index when
+        SQLite has it and a LIKE scan otherwise.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        cursor = get_connection().cursor()
+
+        if has_fts(cursor):
+            match = " ".join('"{}"*'.format(term) for term in terms)
+            cursor.execute(f"""
+                SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+                       c.interval, c.repetitions
+                FROM vocabulary_fts
+                JOIN vocabulary v ON v.id = vocabulary_fts.rowid
+                JOIN user_cards c ON c.user_id = ? AND c.word_id = v.id
+                WHERE vocabulary_fts MATCH ?
+                ORDER BY bm25(vocabulary_fts, {", ".join(map(str, SEARCH_WEIGHTS))})
+                LIMIT ?
+            """, (user_id, match, limit))
+            return cursor.fetchall()
+
+        # Fallback: each term must appear in one of the columns; whole-word
+        # and word-prefix hits on `word` rank first
+        conditions = []
+        params = []
+        for term in terms:
+            # Terms are \w+ runs, so "_" is the only LIKE wildcard to escape
+            pattern = "%" + term.replace("_", "\\_") + "%"
+            conditions.append("""
+                (v.word LIKE ? ESCAPE '\\' OR v.translation LIKE ? ESCAPE '\\'
+                 OR v.example_sentence LIKE ? ESCAPE '\\')
+            """)
+            params.extend((pattern, pattern, pattern))
+
+        cursor.execute(f"""
+            SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+                   c.interval, c.repetitions
+            FROM vocabulary v
+            JOIN user_cards c ON c.user_id = ? AND c.word_id = v.id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY lower(v.word) = lower(?) DESC, v.word LIKE ? || '%' DESC, v.word, v.id
+            LIMIT ?
+        """, [user_id] + params + [query.strip(), terms[0], limit])
+        return cursor.fetchall()
 
     @staticmethod
     def delete_word(word_id: int):
-        """Delete a word from the database"""
-        conn = get_connection()
-        cursor = conn.cursor()
+        """Delete a word, and every learner's card for it, from the database"""
+        with transaction() as conn:
+            conn.execute("DELETE FROM vocabulary WHERE id = ?", (word_id,))
+
+    @staticmethod
+    def dedupe(dry_run: bool = False):
+        """
+        Merge words that share a normalized spelling, in one transaction
+        of set-based statements.
 
-        cursor.execute("DELETE FROM vocabulary WHERE id = ?", (word_id,))
+        Each group keeps the word holding its key (else the oldest), which
+        takes any translation, example or level it lacks from the others.
+        Every learner keeps the strongest of their cards in the group
+        (longest interval, then most repetitions, then highest ease) on
+        the kept word, and review history moves with it. Returns (groups,
+        words removed, cards merged); with `dry_run` nothing is changed.
+        """
+        with transaction(immediate=True) as conn:
+            conn.execute("""
+                CREATE TEMP TABLE word_merge (word_id INTEGER PRIMARY KEY, keeper INTEGER NOT NULL)
+            """)
+            conn.execute("CREATE INDEX temp.idx_word_merge_keeper ON word_merge (keeper)")
+            try:
+                conn.execute("""
+                    INSERT INTO word_merge (word_id, keeper)
+                    SELECT word_id, keeper FROM (
+                        SELECT id AS word_id,
+                               FIRST_VALUE(id) OVER (
+                                   PARTITION BY COALESCE(word_key, normalize_word(word))
+                                   ORDER BY word_key IS NULL, id
+                               ) AS keeper
+                        FROM vocabulary
+                    )
+                    WHERE word_id != keeper
+                """)
+                groups, words, cards = conn.execute("""
+                    SELECT COUNT(DISTINCT keeper), COUNT(*),
+                           (SELECT COUNT(*) FROM user_cards
+                            WHERE word_id IN (SELECT word_id FROM word_merge))
+                    FROM word_merge
+                """).fetchone()
 
-        conn.commit()
-        conn.close()
+                if words and not dry_run:
+                    Vocabulary._merge_duplicates(conn)
+            finally:
+                conn.execute("DROP TABLE temp.word_merge")
+
+        return groups, words, cards
 
     @staticmethod
-    def get_due_words(limit: int = 10):
-        """Get words that are due for review today"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def _merge_duplicates(conn):
+        """Fold the words listed in temp.word_merge into their keepers"""
+        conn.execute("""
+            UPDATE vocabulary SET
+                translation = COALESCE(translation, (
+                    SELECT d.translation FROM word_merge m JOIN vocabulary d ON d.id = m.word_id
+                    WHERE m.keeper = vocabulary.id AND d.translation IS NOT NULL
+                    ORDER BY d.id LIMIT 1)),
+                example_sentence = COALESCE(example_sentence, (
+                    SELECT d.example_sentence FROM word_merge m JOIN vocabulary d ON d.id = m.word_id
+                    WHERE m.keeper = vocabulary.id AND d.example_sentence IS NOT NULL
+                    ORDER BY d.id LIMIT 1)),
+                level = COALESCE(level, (
+                    SELECT d.level FROM word_merge m JOIN vocabulary d ON d.id = m.word_id
+                    WHERE m.keeper = vocabulary.id AND d.level IS NOT NULL
+                    ORDER BY d.id LIMIT 1))
+            WHERE id IN (SELECT keeper FROM word_merge)
+              AND (translation IS NULL OR example_sentence IS NULL OR level IS NULL)
+        """)
 
-        today = datetime.today().strftime("%Y-%m-%d")
+        # Per learner and group, copy the strongest card onto the keeper
+        # when it isn't the keeper's own (ties go to the keeper's card)
+        conn.execute("""
+            INSERT INTO user_cards
+                (user_id, word_id, next_review, interval, ease_factor, repetitions, lapses, suspended)
+            SELECT user_id, keeper, next_review, interval, ease_factor, repetitions, lapses, suspended
+            FROM (
+                SELECT c.*, COALESCE(m.keeper, c.word_id) AS keeper,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY c.user_id, COALESCE(m.keeper, c.word_id)
+                           ORDER BY c.interval DESC, c.repetitions DESC, c.ease_factor DESC,
+                                    m.keeper IS NOT NULL, c.word_id
+                       ) AS strength
+                FROM user_cards c
+                LEFT JOIN word_merge m ON m.word_id = c.word_id
+                WHERE c.word_id IN (SELECT word_id FROM word_merge)
+                   OR c.word_id IN (SELECT keeper FROM word_merge)
+            )
+            WHERE strength = 1 AND word_id != keeper
+            ON CONFLICT (user_id, word_id) DO UPDATE SET
+                next_review = excluded.next_review, interval = excluded.interval,
+                ease_factor = excluded.ease_factor, repetitions = excluded.repetitions,
+                lapses = excluded.lapses, suspended = excluded.suspended
+        """)
 
-        cursor.execute("""
-            SELECT id, word, translation, example_sentence, level
-            FROM vocabulary
-            WHERE next_review <= ?
-            ORDER BY next_review
-            LIMIT ?
-        """, (today, limit))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        # Convert rows to dictionaries
-        words = []
-        for row in rows:
-            words.append({
-                'id': row[0],
-                'word': row[1],
-                'translation': row[2],
-                'example_sentence': row[3],
-                'level': row[4]
-            })
-
-        return words
+        conn.execute("""
+            UPDATE review_log
+            SET word_id = (SELECT keeper FROM word_merge WHERE word_id = review_log.word_id)
+            WHERE word_id IN (SELECT word_id FROM word_merge)
+        """)
+
+        # Triggers remove the duplicates' cards, FTS rows and stats
+        conn.execute("DELETE FROM vocabulary WHERE id IN (SELECT word_id FROM word_merge)")
+        conn.execute("""
+            UPDATE vocabulary SET word_key = normalize_word(word)
+            WHERE word_key IS NULL AND id IN (SELECT keeper FROM word_merge)
+        """)
+
+    @staticmethod
+    def load_cards(word_ids, columns, user_id: int = DEFAULT_USER_ID):
+        """
+        Return {word_id: row} for the given ids in a learner's deck, each
+        row a tuple of the `columns` expressions over user_cards c and
+        vocabulary v.
+        """
+        cursor = plain_cursor()
+        word_ids = list(word_ids)
+        select = ", ".join(columns)
+        cards = {}
+
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(word_ids), 500):
+            chunk = word_ids[start:start + 500]
+            cursor.execute(f"""
+                SELECT c.word_id, {select}
+                FROM user_cards c
+                JOIN vocabulary v ON v.id = c.word_id
+                WHERE c.user_id = ? AND c.word_id IN ({",".join("?" * len(chunk))})
+            """, [user_id] + chunk)
+            for row in cursor:
+                cards[row[0]] = row[1:]
+
+        return cards
+
+    @staticmethod
+    def remove_card(word_id: int, user_id: int = DEFAULT_USER_ID):
+        """
+        Remove a word from a learner's deck. The shared word is deleted too
+        once no learner has it. Returns False if the card didn't exist.
+        """
+        with transaction() as conn:
+            cursor = conn.execute("""
+                DELETE FROM user_cards WHERE user_id = ? AND word_id = ?
+            """, (user_id, word_id))
+            if not cursor.rowcount:
+                return False
+
+            conn.execute("""
+                DELETE FROM vocabulary
+                WHERE id = ?1 AND NOT EXISTS (SELECT 1 FROM user_cards WHERE word_id = ?1)
+            """, (word_id,))
+
+        return True
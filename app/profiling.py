@@ -0,0 +1,242 @@
+"""
+Opt-in profiling and SQL tracing.
+
+start_profiler() runs the rest of the process under cProfile and reports
+when it exits. QueryTracer records, per SQL statement:
+
+- calls: execute()/executemany() calls and commits from Python
+- runs: statement starts reported by SQLite's trace callback (one per
+  executemany() row, plus one per trigger program it fires)
+- time: wall time spent in execute, fetch and commit calls
+- rows: rows fetched, or rows changed by INSERT/UPDATE/DELETE
+- steps: virtual machine instructions, sampled by the progress handler
+
+Statements are grouped with their literals replaced by "?", so the same
+query with different values lands in one row. Enable tracing with
+start_tracing(); the CLI does so for --trace/--trace-json, or when
+ENGLISH_TRAINER_TRACE is set to "1" (table on stderr at exit) or to a
+.json path.
+"""
+from collections import defaultdict
+import atexit
+import cProfile
+import json
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from app import database
+
+
+# Progress handler granularity in VM instructions; lower is more precise
+# and slower
+PROGRESS_STEPS = 100
+
+# Rows shown in the summary tables
+SUMMARY_ROWS = 20
+
+# Literals, and numbered parameters (?1), which SQLite's trace expands
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\?\d*|\b\d+(?:\.\d+)?\b|\bNULL\b", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def statement_key(sql: str) -> str:
+    """Group key for a statement: whitespace collapsed, literals as ?"""
+    return _LITERALS.sub("?", _SPACES.sub(" ", sql).strip().rstrip(";"))
+
+
+# =============================
+# cProfile
+# =============================
+
+def start_profiler(output: str = None, limit: int = 25):
+    """
+    Profile the rest of the process. At exit, print the top `limit`
+    functions by cumulative time to stderr, or save raw stats to
+    `output` (for pstats, snakeviz, ...).
+    """
+    profiler = cProfile.Profile()
+
+    def report():
+        profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+            print(f"✓ Profile written to {output}", file=sys.stderr)
+        else:
+            stats = pstats.Stats(profiler, stream=sys.stderr)
+            stats.sort_stats("cumulative").print_stats(limit)
+
+    atexit.register(report)
+    profiler.enable()
+    return profiler
+
+
+# =============================
+# Query Tracer
+# =============================
+
+class QueryTracer:
+    """Collect per-statement SQL statistics from every connection"""
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: {"calls": 0, "runs": 0, "time": 0.0, "rows": 0, "steps": 0})
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        tracer = self
+
+        class TracingCursor(sqlite3.Cursor):
+            """Cursor that times its calls and counts their rows"""
+            trace_key = None
+
+            def execute(self, sql, parameters=()):
+                return self._call(super().execute, sql, parameters)
+
+            def executemany(self, sql, seq_of_parameters):
+                return self._call(super().executemany, sql, seq_of_parameters)
+
+            def _call(self, method, sql, parameters):
+                self.trace_key = tracer.enter(sql)
+                start = time.perf_counter()
+                try:
+                    return method(sql, parameters)
+                finally:
+                    tracer.record(self.trace_key, time.perf_counter() - start,
+                                  self.rowcount, calls=1)
+
+            def _fetch(self, method, *args):
+                start = time.perf_counter()
+                rows = method(*args)
+                if self.trace_key is not None:
+                    count = len(rows) if isinstance(rows, list) else int(rows is not None)
+                    tracer.record(self.trace_key, time.perf_counter() - start, count)
+                return rows
+
+            def fetchone(self):
+                return self._fetch(super().fetchone)
+
+            def fetchmany(self, size=None):
+                return self._fetch(super().fetchmany, size or self.arraysize)
+
+            def fetchall(self):
+                return self._fetch(super().fetchall)
+
+            def __next__(self):
+                row = self.fetchone()
+                if row is None:
+                    raise StopIteration
+                return row
+
+        class TracingConnection(sqlite3.Connection):
+            """Connection whose cursors and commits report to the tracer"""
+
+            def cursor(self, factory=TracingCursor):
+                return super().cursor(factory)
+
+            def execute(self, sql, parameters=()):
+                return self.cursor().execute(sql, parameters)
+
+            def executemany(self, sql, seq_of_parameters):
+                return self.cursor().executemany(sql, seq_of_parameters)
+
+            def commit(self):
+                key = tracer.enter("COMMIT")
+                start = time.perf_counter()
+                try:
+                    return super().commit()
+                finally:
+                    tracer.record(key, time.perf_counter() - start, 0, calls=1)
+
+        self.connection_factory = TracingConnection
+
+    def install(self, conn):
+        """Attach the trace and progress callbacks to a new connection"""
+        conn.set_trace_callback(self.on_statement)
+        conn.set_progress_handler(self.on_progress, PROGRESS_STEPS)
+
+    def enter(self, sql):
+        """Mark `sql` as this thread's current statement and return its key"""
+        key = statement_key(sql)
+        self.local.key = key
+        return key
+
+    def record(self, key, elapsed, rows, calls=0):
+        with self.lock:
+            entry = self.stats[key]
+            entry["calls"] += calls
+            entry["time"] += elapsed
+            if rows > 0:
+                entry["rows"] += rows
+
+    def on_statement(self, sql):
+        """Trace callback: SQLite started running a statement"""
+        key = statement_key(sql)
+        self.local.key = key
+        with self.lock:
+            self.stats[key]["runs"] += 1
+
+    def on_progress(self):
+        """Progress handler: charge sampled VM steps to the current statement"""
+        key = getattr(self.local, "key", None)
+        if key is not None:
+            with self.lock:
+                self.stats[key]["steps"] += PROGRESS_STEPS
+        return 0  # Non-zero would interrupt the query
+
+    def summary(self):
+        """Return per-statement stats as dicts, most total time first"""
+        with self.lock:
+            rows = [
+                dict(sql=sql, calls=entry["calls"], runs=entry["runs"],
+                     time_ms=round(entry["time"] * 1000, 3), rows=entry["rows"],
+                     steps=entry["steps"])
+                for sql, entry in self.stats.items()
+            ]
+        return sorted(rows, key=lambda row: (-row["time_ms"], -row["runs"]))
+
+    def print_summary(self, file=None, limit=SUMMARY_ROWS):
+        """Print the hottest statements as a table"""
+        file = file or sys.stderr
+        rows = self.summary()
+        total = sum(row["time_ms"] for row in rows)
+
+        print(f"\n{'='*100}", file=file)
+        print(f"  SQL trace: {len(rows)} statements, {total:.1f} ms in SQLite calls", file=file)
+        print(f"{'='*100}", file=file)
+        print(f"  {'calls':>7}{'runs':>8}{'total ms':>11}{'mean ms':>10}{'rows':>9}{'steps':>10}  sql",
+              file=file)
+        for row in rows[:limit]:
+            calls = row["calls"] or row["runs"]
+            mean = row["time_ms"] / calls if calls else 0
+            sql = row["sql"] if len(row["sql"]) <= 60 else row["sql"][:57] + "..."
+            print(f"  {row['calls']:>7}{row['runs']:>8}{row['time_ms']:>11.2f}{mean:>10.3f}"
+                  f"{row['rows']:>9}{row['steps']:>10}  {sql}", file=file)
+        if len(rows) > limit:
+            print(f"  ... {len(rows) - limit} more", file=file)
+        print(f"{'='*100}\n", file=file)
+
+    def dump_json(self, path):
+        """Write the summary to `path` as JSON"""
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"statements": self.summary()}, handle, indent=2)
+
+
+def start_tracing(output: str = None):
+    """
+    Trace SQL on every connection opened from now on and report at exit:
+    a table on stderr, or JSON written to `output`.
+    """
+    tracer = QueryTracer()
+    database.set_tracer(tracer)
+
+    def report():
+        if output:
+            tracer.dump_json(output)
+            print(f"✓ SQL trace written to {output}", file=sys.stderr)
+        else:
+            tracer.print_summary()
+
+    atexit.register(report)
+    return tracer
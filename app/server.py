@@ -0,0 +1,289 @@
+"""
+Local HTTP/JSON API for front ends.
+
+A small asyncio HTTP/1.1 server using only the standard library:
+
+    GET  /due?user=NAME&limit=N    cards due for review (without answers)
+    POST /answers                  {"user", "word_id", "answer", "latency_ms"}
+    GET  /stats?user=NAME          deck size, due counts and today's totals
+
+`user` defaults to "default". Reads run on a small thread pool, each
+thread with its own connection; every write goes through one
+ReviewWriter thread, which group-commits answers from all clients.
+Connections are kept alive unless the client asks otherwise.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import signal
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from app import database
+from app.models.stats import Stats
+from app.models.user import User
+from app.models.vocabulary import Vocabulary
+from app.services.answer_matcher import check_answer
+from app.services.review_queue import NEW_PER_DAY, REVIEWS_PER_DAY
+from app.services.review_writer import ReviewWriter
+from app.services.scheduler import grade_for
+from app.services.srs import SRS
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Threads serving reads; SQLite readers don't block each other in WAL mode
+READ_THREADS = 4
+
+MAX_BODY = 64 * 1024
+MAX_DUE = 100
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON {"error": ...} body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ReviewServer:
+    """Serve the review API on one asyncio event loop"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 read_threads: int = READ_THREADS, new_limit: int = NEW_PER_DAY,
+                 review_limit: int = REVIEWS_PER_DAY):
+        self.host = host
+        self.port = port
+        # Daily caps on the cards /due hands out per learner
+        self.new_limit = new_limit
+        self.review_limit = review_limit
+        self.reads = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="review-read")
+        self.writer = ReviewWriter()
+        self.users = {}
+        self.server = None
+        self.routes = {
+            ("GET", "/due"): self.due,
+            ("POST", "/answers"): self.answer,
+            ("GET", "/stats"): self.stats,
+        }
+
+    async def start(self):
+        """Start the writer thread and begin accepting connections"""
+        self.writer.start()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+        """Stop accepting, flush queued answers and close read connections"""
+        if self.server is not None:
+            self.server.close()
+        self.writer.stop()
+        self.reads.shutdown(wait=True)
+        database.close_all()
+
+    async def read(self, func, *args):
+        """Run a blocking database read on the read pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.reads, func, *args)
+
+    async def user_id(self, name):
+        """Resolve a learner name to an id, creating the profile on first use"""
+        name = name or database.DEFAULT_USER
+        if name not in self.users:
+            self.users[name] = await self.read(User.get_or_create, name)
+        return self.users[name]
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {"error": "Headers too large"}, False)
+                    return
+
+                method, target, headers = parse_head(head)
+                keep_alive = method is not None and headers.get("connection", "").lower() != "close"
+
+                try:
+                    if method is None:
+                        raise HTTPError(400, "Malformed request line")
+
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "Body too large")
+                    body = await reader.readexactly(length) if length else b""
+
+                    url = urlsplit(target)
+                    route = self.routes.get((method, url.path))
+                    if route is None:
+                        if any(path == url.path for _, path in self.routes):
+                            raise HTTPError(405, f"{method} not allowed on {url.path}")
+                        raise HTTPError(404, f"No route for {url.path}")
+
+                    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    status, payload = 200, await route(query, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError as e:
+                    status, payload = 400, {"error": str(e)}
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    print(f"✗ Error handling {method} {target}: {e}", file=sys.stderr)
+                    status, payload = 500, {"error": "Internal error"}
+
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode("ascii") + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # -----------------------------
+    # Routes
+    # -----------------------------
+
+    async def due(self, query, body):
+        """Cards due for a learner, without their translations"""
+        user_id = await self.user_id(query.get("user"))
+        limit = min(int(query.get("limit", 10)), MAX_DUE)
+
+        words = await self.read(SRS.get_due_words, limit, user_id,
+                                self.new_limit, self.review_limit)
+        return {
+            "cards": [
+                {
+                    "id": word["id"],
+                    "word": word["word"],
+                    "example_sentence": word["example_sentence"],
+                    "level": word["level"],
+                }
+                for word in words
+            ]
+        }
+
+    async def answer(self, query, body):
+        """Grade an answer and return once it has been committed"""
+        try:
+            data = json.loads(body or b"{}")
+            word_id = int(data["word_id"])
+            answer = str(data.get("answer", ""))
+            latency_ms = data.get("latency_ms")
+            latency_ms = None if latency_ms is None else int(latency_ms)
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPError(400, f"Expected JSON with word_id and answer ({e})")
+
+        user_id = await self.user_id(data.get("user"))
+        word = await self.read(Vocabulary.get_word_by_id, word_id, user_id)
+        if word is None or word[8] is None:
+            raise HTTPError(404, f"Word {word_id} is not in this deck")
+
+        match = check_answer(answer, word[2])
+        grade = grade_for(match.correct, match.typo)
+        await asyncio.wrap_future(self.writer.submit(user_id, word_id, grade, latency_ms))
+
+        return {
+            "correct": match.correct,
+            "typo": match.typo,
+            "expected": match.expected,
+            "grade": grade,
+        }
+
+    async def stats(self, query, body):
+        """Deck summary and today's totals for a learner"""
+        user_id = await self.user_id(query.get("user"))
+
+        def load():
+            deck = Stats.deck_summary(user_id=user_id)
+            today = Stats.get_day(user_id=user_id)
+            reviewed, correct, accuracy = (today[0], today[1], today[2]) if today else (0, 0, 0)
+            return deck, reviewed, correct, accuracy
+
+        deck, reviewed, correct, accuracy = await self.read(load)
+        return {
+            "total": deck["total"],
+            "levels": {level or "": cards for level, cards in deck["levels"].items()},
+            "due_today": deck["due_today"],
+            "due_week": deck["due_week"],
+            "today": {"reviewed": reviewed, "correct": correct, "accuracy": accuracy},
+        }
+
+
+def parse_head(head: bytes):
+    """
+    Split a request head into (method, target, lowercase headers).
+    `method` is None if the request line is malformed.
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        return None, lines[0], {}
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          new_limit: int = NEW_PER_DAY, review_limit: int = REVIEWS_PER_DAY):
+    """Run the API until interrupted (Ctrl+C or SIGTERM), then flush and stop"""
+    server = ReviewServer(host, port, new_limit=new_limit, review_limit=review_limit)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, task.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+        await server.start()
+        print(f"✓ Serving on http://{server.host}:{server.port} (Ctrl+C to stop)", flush=True)
+        try:
+            async with server.server:
+                await server.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,166 @@
+from collections import namedtuple
+from functools import lru_cache
+import re
+import unicodedata
+
+
+# Leading articles and particles that shouldn't decide right from wrong
+ARTICLES = frozenset({
+    "a", "an", "the", "to",
+    "el", "la", "los", "las", "lo", "un", "una", "unos", "unas",
+})
+
+# Characters that separate accepted alternatives: "hola, buenas / qué tal"
+_ALTERNATIVES = re.compile(r"[,/;|]")
+
+# Parenthesized notes such as "(informal)" are not part of the answer
+_NOTES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+_SPACES = re.compile(r"\s+")
+
+
+Match = namedtuple("Match", ["correct", "typo", "expected"])
+Match.__doc__ = """
+Result of checking an answer.
+
+`correct` is True for an exact or near match, `typo` is True when the
+answer only matched within the typo allowance, and `expected` is the
+alternative it was matched against (or the full translation on a miss).
+"""
+
+
+def max_typos(length: int) -> int:
+    """Edits allowed for an answer of `length` characters"""
+    if length <= 3:
+        return 0
+    if length <= 7:
+        return 1
+    return 2
+
+
+@lru_cache(maxsize=65536)
+def normalize(text: str, articles: bool = True) -> str:
+    """
+    Fold an answer to a comparable form.
+
+    Lowercases, strips accents and punctuation, collapses whitespace and
+    drops leading articles (unless `articles` is False), so "¡El Árbol!"
+    and "arbol" compare equal.
+    """
+    text = _NOTES.sub(" ", text)
+    text = unicodedata.normalize("NFKD", text).casefold()
+    text = "".join(
+        " " if unicodedata.category(ch)[0] in "PS" else ch
+        for ch in text
+        if not unicodedata.combining(ch)
+    )
+    words = _SPACES.sub(" ", text).strip().split(" ")
+
+    while articles and len(words) > 1 and words[0] in ARTICLES:
+        words.pop(0)
+
+    return " ".join(words)
+
+
+@lru_cache(maxsize=65536)
+def alternatives(translation: str):
+    """
+    Return the normalized accepted answers for a translation, keyed by
+    their normalized form so each is only computed once per process.
+    """
+    forms = {}
+    for part in _ALTERNATIVES.split(translation or ""):
+        form = normalize(part)
+        if form and form not in forms:
+            forms[form] = part.strip()
+    return tuple(forms.items())
+
+
+def prepare(translations):
+    """Normalize a batch of translations ahead of time (e.g. at session start)"""
+    for translation in translations:
+        alternatives(translation)
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """
+    Return True if the Levenshtein distance between a and b is <= limit.
+
+    Only a band of width 2 * limit + 1 around the diagonal is computed and
+    the scan stops as soon as every cell in a row exceeds the limit.
+    """
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if limit == 0:
+        return False
+
+    if len(a) > len(b):
+        a, b = b, a
+
+    too_far = limit + 1
+    previous = list(range(len(b) + 1))
+
+    for i in range(1, len(a) + 1):
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= limit else too_far
+        best = current[0]
+
+        ca = a[i - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+
+        if best > limit:
+            return False
+        previous = current
+
+    return previous[len(b)] <= limit
+
+
+def check_answer(answer: str, translation: str) -> Match:
+    """
+    Check an answer against every accepted alternative of a translation.
+
+    An exact match after normalization wins; otherwise the closest
+    alternative within max_typos() edits counts as correct with a typo.
+    """
+    given = normalize(answer or "")
+    options = alternatives(translation or "")
+
+    if given:
+        for form, original in options:
+            if given == form:
+                return Match(True, False, original)
+
+        limit = max_typos(len(given))
+        for form, original in options:
+            if within_distance(given, form, min(limit, max_typos(len(form)))):
+                return Match(True, True, original)
+
+    return Match(False, False, translation)
+
+
+def check_exact(answer: str, expected: str) -> Match:
+    """
+    Strict check for answers where one letter or article is the point,
+    such as grammar exercises: the normalized answer must equal one of
+    the accepted alternatives, articles included and with no typos.
+    """
+    given = normalize(answer or "", articles=False)
+    if given:
+        for part in _ALTERNATIVES.split(expected or ""):
+            if given == normalize(part, articles=False):
+                return Match(True, False, part.strip())
+
+    return Match(False, False, expected)
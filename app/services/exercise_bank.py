@@ -0,0 +1,235 @@
+"""
+Packed grammar exercise bank.
+
+Exercises are fill-in-the-blank items (prompt, answer, hint) grouped by
+grammar topic and difficulty. build_bank() packs them into one file:
+
+    header      magic, version, item count, offsets and directory positions
+    items       UTF-8 "prompt\\x1fanswer\\x1fhint" records, back to back,
+                sorted by topic and then difficulty
+    offsets     item count + 1 little-endian u64 start positions
+    directory   JSON: per topic and difficulty, the (first item, count)
+                range of its items
+
+ExerciseBank memory-maps the file and parses only the header and the
+directory when opened, however many items there are. Picking exercises
+reads just the chosen records, so a session touches a few pages of a
+bank that may hold hundreds of thousands of items.
+"""
+import bisect
+import csv
+import itertools
+import json
+import mmap
+import os
+import random
+import struct
+from pathlib import Path
+
+from app.database import DATA_DIR
+from app.models.vocabulary import LEVELS
+
+BANK_PATH = Path(os.environ.get("ENGLISH_TRAINER_GRAMMAR_BANK", DATA_DIR / "grammar_bank.bin"))
+
+MAGIC = b"ETGB"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHIQQ")
+_OFFSET = struct.Struct("<Q")
+_SEPARATOR = "\x1f"
+
+FORMATS = ("csv", "jsonl")
+
+
+class Exercise:
+    """One fill-in-the-blank item"""
+
+    __slots__ = ("topic", "difficulty", "prompt", "answer", "hint")
+
+    def __init__(self, topic, difficulty, prompt, answer, hint=None):
+        self.topic = topic
+        self.difficulty = difficulty
+        self.prompt = prompt
+        self.answer = answer
+        self.hint = hint or None
+
+
+# -----------------------------
+# Building
+# -----------------------------
+
+def read_exercises(path, fmt=None):
+    """
+    Yield Exercises from a CSV (with a header row) or JSONL file with
+    topic, difficulty, prompt, answer and optional hint fields. Rows
+    missing a topic, prompt or answer, or with an unknown difficulty,
+    are skipped.
+    """
+    fmt = fmt or ("csv" if Path(path).suffix.lower() == ".csv" else "jsonl")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if fmt == "csv":
+            records = csv.DictReader(handle)
+        else:
+            records = (json.loads(line) for line in handle if line.strip())
+
+        for record in records:
+            topic = (record.get("topic") or "").strip()
+            prompt = (record.get("prompt") or "").strip()
+            answer = (record.get("answer") or "").strip()
+            difficulty = (record.get("difficulty") or LEVELS[0]).strip().lower()
+            if topic and prompt and answer and difficulty in LEVELS:
+                yield Exercise(topic, difficulty, prompt, answer,
+                               (record.get("hint") or "").strip())
+
+
+def build_bank(exercises, path=None):
+    """
+    Pack exercises into a bank file at `path` (BANK_PATH by default),
+    replacing it atomically. Returns the number of items written.
+    """
+    path = Path(path or BANK_PATH)
+
+    groups = {}
+    for exercise in exercises:
+        record = _SEPARATOR.join((exercise.prompt, exercise.answer, exercise.hint or ""))
+        groups.setdefault((exercise.topic, exercise.difficulty), []).append(record.encode("utf-8"))
+
+    order = sorted(groups, key=lambda key: (key[0], LEVELS.index(key[1])))
+    directory = {}
+    offsets = []
+    position = _HEADER.size
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_suffix(path.suffix + ".tmp")
+    with open(temp, "wb") as handle:
+        handle.write(b"\0" * _HEADER.size)
+
+        for topic, difficulty in order:
+            records = groups[(topic, difficulty)]
+            directory.setdefault(topic, {})[difficulty] = [len(offsets), len(records)]
+            for record in records:
+                offsets.append(position)
+                position += len(record)
+            handle.writelines(records)
+
+        offsets.append(position)
+        offsets_position = position
+        handle.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        directory_position = handle.tell()
+        handle.write(json.dumps(directory, ensure_ascii=False).encode("utf-8"))
+
+        handle.seek(0)
+        handle.write(_HEADER.pack(MAGIC, VERSION, len(offsets) - 1,
+                                  offsets_position, directory_position))
+
+    os.replace(temp, path)
+    return len(offsets) - 1
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class ExerciseBank:
+    """
+    Read-only view of a packed bank file.
+
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or BANK_PATH)
+        if not self.path.exists():
+            raise FileNotFoundError(
+                f"No grammar exercise bank at '{self.path}'. Build one with 'grammar import'."
+            )
+
+        with open(self.path, "rb") as handle:
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count, self.offsets, directory = _HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"'{self.path}' is not a version {VERSION} exercise bank")
+        self.directory = json.loads(self.data[directory:].decode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def topics(self):
+        """Return {topic: {difficulty: item count}}"""
+        return {
+            topic: {level: count for level, (_, count) in levels.items()}
+            for topic, levels in self.directory.items()
+        }
+
+    def item_range(self, topic, difficulty=None):
+        """
+        Return (first, count) of a topic's items, or of one difficulty's.
+        Items are stored by topic and then difficulty, so a whole topic is
+        one contiguous range too.
+        """
+        levels = self.directory.get(topic)
+        if levels is None:
+            raise ValueError(f"Unknown grammar topic '{topic}'")
+
+        if difficulty is not None:
+            return tuple(levels.get(difficulty, (0, 0)))
+
+        ranges = [levels[level] for level in LEVELS if level in levels]
+        return ranges[0][0], sum(count for _, count in ranges)
+
+    def get(self, index):
+        """Decode item `index` of the bank into an Exercise"""
+        start, = _OFFSET.unpack_from(self.data, self.offsets + index * _OFFSET.size)
+        end, = _OFFSET.unpack_from(self.data, self.offsets + (index + 1) * _OFFSET.size)
+        prompt, answer, hint = self.data[start:end].decode("utf-8").split(_SEPARATOR)
+        topic, difficulty = self._locate(index)
+        return Exercise(topic, difficulty, prompt, answer, hint)
+
+    def level_ranges(self, difficulty):
+        """Return the (first, count) range of one difficulty in every topic"""
+        return [
+            tuple(levels[difficulty]) for levels in self.directory.values()
+            if difficulty in levels
+        ]
+
+    def pick(self, topic=None, difficulty=None, count=10, rng=None):
+        """
+        Return up to `count` distinct random exercises of a topic, or from
+        the whole bank when `topic` is None, optionally of one difficulty.
+        """
+        if topic:
+            ranges = [self.item_range(topic, difficulty)]
+        elif difficulty:
+            ranges = self.level_ranges(difficulty)
+        else:
+            ranges = [(0, self.count)]
+
+        # Sample positions across the ranges as if they were one
+        starts = list(itertools.accumulate(size for _, size in ranges))
+        total = starts[-1] if starts else 0
+        rng = rng or random
+
+        picked = []
+        for n in rng.sample(range(total), min(count, total)):
+            i = bisect.bisect_right(starts, n)
+            first, _ = ranges[i]
+            picked.append(self.get(first + n - (starts[i - 1] if i else 0)))
+        return picked
+
+    def _locate(self, index):
+        for topic, levels in self.directory.items():
+            for level, (first, count) in levels.items():
+                if first <= index < first + count:
+                    return topic, level
+        raise IndexError(index)
@@ -0,0 +1,159 @@
+import csv
+import gzip
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from app import database
+
+
+# Tables written by export_tables(), parents before children. deck_stats
+# and due_counts are derived from user_cards and the full-text index from
+# vocabulary, so they are rebuilt instead of exported.
+TABLES = (
+    "users",
+    "vocabulary",
+    "user_cards",
+    "grammar_topics",
+    "writing_practice",
+    "speaking_sessions",
+    "daily_progress",
+    "review_log",
+)
+
+FORMATS = ("csv", "jsonl")
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH = 5000
+
+# zlib's own default; gzip.open() defaults to 9, which is several times
+# slower for a few percent smaller files
+GZIP_LEVEL = 6
+
+# Pages copied per backup step; the source is unlocked between steps
+BACKUP_PAGES = 1024
+
+
+class ExportResult:
+    """Row counts and output files of a finished export"""
+
+    def __init__(self):
+        self.files = {}
+        self.rows = {}
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return sum(self.rows.values())
+
+
+def export_path(directory, table, fmt, compress=False):
+    """File export_tables() writes `table` to"""
+    return Path(directory) / f"{table}.{fmt}{'.gz' if compress else ''}"
+
+
+def export_tables(directory, fmt="jsonl", compress=False, tables=TABLES,
+                  batch_size=EXPORT_BATCH, progress=None):
+    """
+    Stream tables to one file each in `directory`.
+
+    Rows are read `batch_size` at a time with fetchmany() and written
+    straight out, so memory use does not depend on the table size. All
+    tables are read in one transaction and form a consistent snapshot;
+    in WAL mode writers are not blocked meanwhile. `progress`, if given,
+    is called with (table, rows) after each table.
+
+    CSV files have a header row; vocabulary.csv can be re-imported with
+    the import command.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    unknown = [table for table in tables if table not in TABLES]
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    result = ExportResult()
+    start = time.perf_counter()
+
+    conn = database.get_connection()
+    cursor = database.plain_cursor()
+
+    cursor.execute("BEGIN")
+    try:
+        for table in tables:
+            path = export_path(directory, table, fmt, compress)
+            cursor.execute(f"SELECT * FROM {table}")
+            columns = [column[0] for column in cursor.description]
+
+            with _open(path, compress) as handle:
+                count = _write_rows(handle, cursor, columns, fmt, batch_size)
+
+            result.files[table] = path
+            result.rows[table] = count
+            if progress:
+                progress(table, count)
+    finally:
+        conn.rollback()  # Read only; just ends the snapshot
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _open(path, compress):
+    if compress:
+        return gzip.open(path, "wt", compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _write_rows(handle, cursor, columns, fmt, batch_size):
+    """Write every remaining row of `cursor` to `handle`; returns the count"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+    else:
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return count
+        count += len(rows)
+
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            handle.writelines(encode(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def backup(target, pages=BACKUP_PAGES, progress=None):
+    """
+    Copy the live database to `target` with SQLite's online backup API.
+
+    The copy runs `pages` pages at a time and other connections can use
+    the database between steps, so active sessions are only held up for
+    one step. `progress`, if given, is called with (copied, total) pages
+    after each step. The result is a consistent snapshot: if another
+    connection writes mid-copy, SQLite restarts the copy.
+    """
+    target = Path(target)
+    if target.resolve() == database.DB_PATH.resolve():
+        raise ValueError("Backup target is the database itself")
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    def report(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+
+    source = database.get_connection()
+    dest = sqlite3.connect(str(target))
+    try:
+        source.backup(dest, pages=pages, progress=report)
+    finally:
+        dest.close()
+
+    return target
@@ -0,0 +1,203 @@
+from array import array
+from collections import namedtuple
+from datetime import date
+import random
+from app.database import DEFAULT_USER_ID, plain_cursor
+from app.services.scheduler import (
+    DEFAULT_EASE, GRADE_CORRECT, GRADE_INCORRECT, sm2, sm2_arrays
+)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure Python path is just slower
+    np = None
+
+
+# Rows fetched per round trip while loading a deck
+LOAD_BATCH = 10000
+
+# due_in is stored as int16; cards due later are clamped to this day
+_NEVER = 32767
+
+DEFAULT_RETENTION = 0.9
+DEFAULT_RUNS = 5
+
+# Card-days default_runs() spends across all runs: about one year of a
+# 1M-card deck, a few seconds with NumPy
+RUN_BUDGET = 400_000_000
+
+
+Forecast = namedtuple("Forecast", ["start", "step", "cards", "runs", "mean", "low", "high"])
+Forecast.__doc__ = """
+Result of a review-load simulation.
+
+`mean`, `low` and `high` hold one value per `step` days from `start`:
+the mean number of reviews across runs and the 10th and 90th
+percentiles.
+"""
+
+
+def load_deck(user_id: int = DEFAULT_USER_ID, today: date = None):
+    """
+    Load a learner's scheduling state as compact parallel arrays.
+
+    Returns (repetitions, intervals, ease_factors, due_in) where due_in
+    is days from today until each card is due, with overdue cards at 0.
+    Suspended cards are left out.
+    NumPy arrays when NumPy is installed, array.array otherwise.
+    """
+    today = today or date.today()
+    cursor = plain_cursor()
+
+    cursor.execute("""
+        SELECT COALESCE(repetitions, 0), COALESCE(interval, 0),
+               COALESCE(ease_factor, ?),
+               MAX(0, COALESCE(CAST(julianday(next_review) - julianday(?) AS INTEGER), 0))
+        FROM user_cards
+        WHERE user_id = ? AND NOT suspended
+    """, (DEFAULT_EASE, today.isoformat(), user_id))
+
+    columns = (array("i"), array("i"), array("d"), array("i"))
+    while True:
+        rows = cursor.fetchmany(LOAD_BATCH)
+        if not rows:
+            break
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+
+    if np is None:
+        return columns
+
+    reps, intervals, eases, due_in = columns
+    return (
+        np.asarray(reps, dtype=np.int32),
+        np.asarray(intervals, dtype=np.int32),
+        np.asarray(eases, dtype=np.float64),
+        np.minimum(np.asarray(due_in, dtype=np.int64), _NEVER).astype(np.int16),
+    )
+
+
+def default_runs(cards: int, days: int):
+    """
+    Runs for a forecast of `cards` cards over `days` days: DEFAULT_RUNS
+    while they fit RUN_BUDGET, fewer for large decks and long horizons,
+    and at least one.
+    """
+    return max(1, min(DEFAULT_RUNS, RUN_BUDGET // max(1, cards * days)))
+
+
+def simulate(deck, days: int, retention: float = DEFAULT_RETENTION,
+             runs: int = DEFAULT_RUNS, seed: int = None, today: date = None,
+             step: int = 1):
+    """
+    Forecast daily review counts with a Monte Carlo simulation.
+
+    Each run replays `days` days in which every due card is reviewed and
+    recalled with probability `retention`, then rescheduled with SM-2
+    exactly as SRS.update_word_review() would. `deck` is what load_deck()
+    returns. Counts are summed over `step` days (7 for weekly totals)
+    before the percentiles are taken. Returns a Forecast.
+    """
+    if not 0 <= retention <= 1:
+        raise ValueError(f"Retention must be between 0 and 1, got {retention}")
+    if runs < 1:
+        raise ValueError(f"Runs must be at least 1, got {runs}")
+    if days < 1 or days >= _NEVER:
+        raise ValueError(f"Days must be between 1 and {_NEVER - 1}, got {days}")
+    if step < 1:
+        raise ValueError(f"Step must be at least 1, got {step}")
+
+    if np is not None:
+        counts = _simulate_numpy(deck, days, retention, runs, seed)
+        counts = np.add.reduceat(counts, np.arange(0, days, step), axis=1)
+        counts.sort(axis=0)
+        mean = counts.mean(axis=0).tolist()
+        low, high = (counts[_rank(runs, pct)].tolist() for pct in (10, 90))
+    else:
+        counts = [
+            [sum(run[first:first + step]) for first in range(0, days, step)]
+            for run in _simulate_python(deck, days, retention, runs, seed)
+        ]
+        by_day = [sorted(day) for day in zip(*counts)]
+        mean = [sum(day) / runs for day in by_day]
+        low = [day[_rank(runs, 10)] for day in by_day]
+        high = [day[_rank(runs, 90)] for day in by_day]
+
+    return Forecast(today or date.today(), step, len(deck[0]), runs, mean, low, high)
+
+
+def _simulate_numpy(deck, days, retention, runs, seed):
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((runs, days), dtype=np.int64)
+
+    for run in range(runs):
+        # buckets[day] holds (repetitions, intervals, ease_factors) chunks
+        # of the cards due that day, so a day's cards are contiguous and
+        # never gathered from or scattered back into the whole deck
+        buckets = [[] for _ in range(days)]
+        reps, intervals, eases, due_in = deck
+        _distribute(buckets, due_in, reps, intervals, eases)
+
+        for day in range(days):
+            if not buckets[day]:
+                continue
+            reps, intervals, eases = (np.concatenate(column) for column in zip(*buckets[day]))
+            buckets[day] = None
+            counts[run, day] = len(reps)
+
+            grades = np.where(rng.random(len(reps)) < retention, GRADE_CORRECT, GRADE_INCORRECT)
+            reps, intervals, eases = sm2_arrays(reps, intervals, eases, grades)
+            _distribute(buckets, day + intervals, reps, intervals, eases)
+
+    return counts
+
+
+def _distribute(buckets, due, *columns):
+    """Append the cards in `columns` to the buckets of their `due` days"""
+    keep = np.flatnonzero(due < len(buckets))
+    # A stable sort of int16 keys is a radix sort, linear in the cards
+    due = due[keep].astype(np.int16)
+    order = np.argsort(due, kind="stable")
+    due = due[order]
+    order = keep[order]
+    columns = [column[order] for column in columns]
+
+    starts = np.flatnonzero(np.diff(due, prepend=-1))
+    ends = np.append(starts[1:], len(due))
+    for start, end, day in zip(starts.tolist(), ends.tolist(), due[starts].tolist()):
+        buckets[day].append([column[start:end] for column in columns])
+
+
+def _simulate_python(deck, days, retention, runs, seed):
+    rng = random.Random(seed)
+    counts = []
+
+    for _ in range(runs):
+        reps, intervals, eases, due_in = (array(column.typecode, column) for column in deck)
+        run = [0] * days
+
+        # Bucket cards by due day so each day only touches its own cards
+        buckets = [[] for _ in range(days)]
+        for card, day in enumerate(due_in):
+            if day < days:
+                buckets[day].append(card)
+
+        for day in range(days):
+            run[day] = len(buckets[day])
+            for card in buckets[day]:
+                grade = GRADE_CORRECT if rng.random() < retention else GRADE_INCORRECT
+                reps[card], intervals[card], eases[card] = sm2(
+                    reps[card], intervals[card], eases[card], grade
+                )
+                if day + intervals[card] < days:
+                    buckets[day + intervals[card]].append(card)
+            buckets[day] = None
+
+        counts.append(run)
+
+    return counts
+
+
+def _rank(count, pct):
+    """Index of the `pct` percentile in `count` sorted values"""
+    return min(count - 1, int(count * pct / 100))
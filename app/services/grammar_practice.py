@@ -0,0 +1,77 @@
+from collections import defaultdict
+from app.database import DEFAULT_USER_ID
+from app.models.grammar import GrammarTopic
+from app.services.answer_matcher import check_exact
+
+
+# A topic practiced at more than one difficulty in a session
+MIXED = object()
+
+
+class GrammarSession:
+    """Fill-in-the-blank practice over exercises from an ExerciseBank"""
+
+    def __init__(self, bank, user_id: int = DEFAULT_USER_ID):
+        self.bank = bank
+        self.user_id = user_id
+        # topic -> [difficulty, correct, total]
+        self.results = defaultdict(lambda: [None, 0, 0])
+
+    def run(self, topic=None, difficulty=None, count=10):
+        """Practice `count` exercises of a topic (any topic when None)"""
+        exercises = self.bank.pick(topic, difficulty, count)
+        if not exercises:
+            print("\n✗ No exercises for this topic and level.")
+            return
+
+        print(f"\n{'='*50}")
+        print(f"  Grammar Practice: {topic or 'mixed topics'} ({len(exercises)} exercises)")
+        print(f"{'='*50}")
+
+        for i, exercise in enumerate(exercises, 1):
+            print(f"\n[{i}/{len(exercises)}] {exercise.topic} ({exercise.difficulty})")
+            print(f"   {exercise.prompt}")
+            if exercise.hint:
+                print(f"   Hint: {exercise.hint}")
+
+            answer = input("   Your answer: ").strip()
+            correct = self.grade(exercise, answer)
+            if correct:
+                print("   ✓ Correct!")
+            else:
+                print(f"   ✗ Incorrect (correct answer: {exercise.answer})")
+
+        self.finish()
+
+    def grade(self, exercise, answer):
+        """Check an answer and count it towards its topic; returns True if right"""
+        correct = check_exact(answer, exercise.answer).correct
+        result = self.results[exercise.topic]
+        result[0] = exercise.difficulty if result[0] in (None, exercise.difficulty) else MIXED
+        result[1] += correct
+        result[2] += 1
+        return correct
+
+    def save(self):
+        """Write every practiced topic's mastery in one batch"""
+        GrammarTopic.record_results(
+            {
+                topic: (None if difficulty is MIXED else difficulty, correct, total)
+                for topic, (difficulty, correct, total) in self.results.items()
+            },
+            user_id=self.user_id
+        )
+
+    def finish(self):
+        correct = sum(result[1] for result in self.results.values())
+        total = sum(result[2] for result in self.results.values())
+
+        print(f"\n{'='*50}")
+        print("  Session Complete!")
+        print(f"{'='*50}")
+        for topic, (_, topic_correct, topic_total) in sorted(self.results.items()):
+            print(f"  {topic:<30}{topic_correct:>4}/{topic_total}")
+        print(f"  {'Total':<30}{correct:>4}/{total}")
+        print(f"{'='*50}\n")
+
+        self.save()
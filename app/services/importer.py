@@ -0,0 +1,153 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from app.database import DEFAULT_USER_ID
+from app.models.vocabulary import Vocabulary, LEVELS
+
+
+# Column order used for files without a header row
+FIELDS = ("word", "translation", "example_sentence", "level")
+
+# Accepted header spellings for each column
+ALIASES = {
+    "example": "example_sentence",
+    "english": "word",
+}
+
+FORMATS = ("csv", "tsv", "jsonl")
+
+
+class ImportResult:
+    """Counters for a finished import"""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.invalid = 0
+        self.elapsed = 0.0
+
+    @property
+    def duplicates(self):
+        """Valid rows whose word was already in the deck (under any spelling of its key)"""
+        return self.read - self.inserted - self.invalid
+
+    @property
+    def rate(self):
+        """Rows processed per second"""
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def detect_format(path):
+    """Guess the file format from its extension"""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix in ("json", "ndjson"):
+        return "jsonl"
+    if suffix == "txt":
+        return "tsv"
+    if suffix in FORMATS:
+        return suffix
+    raise ValueError(f"Cannot detect format of '{path}', use --format")
+
+
+def read_rows(handle, fmt):
+    """
+    Yield one dict per record from an open text file.
+
+    Delimited files may have a header row naming the columns; otherwise
+    columns are taken in FIELDS order.
+    """
+    if fmt == "jsonl":
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            # Malformed lines come through as empty records and count as invalid
+            yield record if isinstance(record, dict) else {}
+        return
+
+    reader = csv.reader(handle, delimiter="\t" if fmt == "tsv" else ",")
+    first = next(reader, None)
+    if first is None:
+        return
+
+    header = [ALIASES.get(name.strip().lower(), name.strip().lower()) for name in first]
+    if "word" in header:
+        fields = header
+    else:
+        fields = FIELDS
+        yield dict(zip(fields, first))
+
+    for record in reader:
+        yield dict(zip(fields, record))
+
+
+def clean_row(row, default_level=None):
+    """
+    Validate a record and return a (word, translation, example, level)
+    tuple, or None if the row is invalid.
+    """
+    word = (row.get("word") or "").strip()
+    if not word:
+        return None
+
+    level = (row.get("level") or default_level or "").strip().lower() or None
+    if level is not None and level not in LEVELS:
+        return None
+
+    translation = (row.get("translation") or "").strip() or None
+    example = (row.get("example_sentence") or row.get("example") or "").strip() or None
+
+    return word, translation, example, level
+
+
+def import_file(path, fmt=None, default_level=None, chunk_size=10000, progress=None,
+                user_id=DEFAULT_USER_ID):
+    """
+    Stream a vocabulary file into a learner's deck.
+
+    Rows are parsed, validated and inserted `chunk_size` at a time, one
+    transaction per chunk, so memory use does not grow with the file.
+    `progress`, if given, is called with the running ImportResult after
+    each chunk.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    if default_level is not None and default_level not in LEVELS:
+        raise ValueError(f"Invalid level '{default_level}'")
+
+    result = ImportResult()
+    start = time.perf_counter()
+
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        records = read_rows(handle, fmt)
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            rows = []
+            for record in chunk:
+                row = clean_row(record, default_level)
+                if row is None:
+                    result.invalid += 1
+                else:
+                    rows.append(row)
+
+            result.read += len(chunk)
+            result.inserted += Vocabulary.add_words(rows, user_id)
+            result.elapsed = time.perf_counter() - start
+
+            if progress:
+                progress(result)
+
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -1,34 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+import queue
+import threading
 import time
-from app.database import get_connection
+from app import database
+from app.database import DEFAULT_USER_ID, retry_on_busy, transaction
+from app.services.answer_matcher import check_answer, prepare
+from app.services.review_queue import NEW_PER_DAY, REVIEWS_PER_DAY, ReviewQueue
+from app.services.scheduler import LEECH_LAPSES, grade_for, is_lapse
+
+
+# Marks the end of a CardPrefetcher's cards
+_DONE = object()
+
+
+class CardPrefetcher(threading.Thread):
+    """
+    Load a learner's due cards in a background thread, a batch ahead.
+
+    Cards are popped from a ReviewQueue a batch at a time, and their
+    accepted answers are normalized before they are queued, so the next
+    card is ready before the current one is answered. Iterate over the
+    prefetcher to get the cards; `limit` caps the total, None reads until
+    the review queue is empty.
+    """
+
+    BATCH_SIZE = 20
+
+    def __init__(self, review_queue: ReviewQueue, limit: int = None, batch_size: int = None):
+        super().__init__(name="card-prefetch", daemon=True)
+        self.review_queue = review_queue
+        self.limit = limit
+        self.batch_size = batch_size or self.BATCH_SIZE
+        # Bounded, so at most about one batch waits in memory
+        self.queue = queue.Queue(maxsize=self.batch_size)
+        self.stopped = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            remaining = self.limit
+            while self.review_queue and (remaining is None or remaining > 0):
+                size = self.batch_size if remaining is None else min(self.batch_size, remaining)
+                words = self.review_queue.pop(size)
+
+                prepare(word['translation'] for word in words)
+                for word in words:
+                    if not self._put(word):
+                        return
+
+                if remaining is not None:
+                    remaining -= len(words)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(_DONE)
+            database.close_connection()
+
+    def _put(self, item):
+        """Queue an item, waiting for room; False once stop() is called"""
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        while True:
+            word = self.queue.get()
+            if word is _DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield word
+
+    def stop(self):
+        """Stop loading cards and wait for the thread to exit"""
+        self.stopped.set()
+        self.join()
 
 
 class PracticeSession:
-    """Handle practice sessions with progress tracking"""
+    """Handle one learner's practice sessions with progress tracking"""
 
-    def __init__(self, srs_service):
+    # Reviews are buffered in memory and written every FLUSH_EVERY answers
+    FLUSH_EVERY = 50
+
+    def __init__(self, srs_service, flush_every: int = None, user_id: int = DEFAULT_USER_ID):
         self.srs = srs_service
+        self.user_id = user_id
         self.reviewed = 0
         self.correct = 0
         self.incorrect = 0
         self.start_time = None
+        self.flush_every = flush_every or self.FLUSH_EVERY
+        self.pending = []
+        # While run() is going, full buffers are written by this thread
+        self.writer = None
+        self.writes = []
+
+    def run(self, limit=10, continuous=False, time_budget=None,
+            new_limit=NEW_PER_DAY, review_limit=REVIEWS_PER_DAY):
+        """
+        Run a practice session.
 
-    def run(self, limit=10):
-        """Run a practice session with a specified number of words"""
+        Reviews up to `limit` due words, most urgent first, or with
+        `continuous` keeps going until today's ReviewQueue is empty (see
+        `new_limit` and `review_limit`). Either way the session ends early
+        once `time_budget` seconds have passed. Cards are loaded by a
+        CardPrefetcher and answers are written in the background, so no
+        query runs between an answer and the next prompt. If the session
+        is cut short (Ctrl+C, end of input, an error), the answers given
+        so far are still saved before the exception propagates.
+        """
         self.start_time = time.time()
+        deadline = self.start_time + time_budget if time_budget else None
 
-        words = self.srs.get_due_words(limit)
+        review_queue = ReviewQueue(self.user_id, new_limit=new_limit, review_limit=review_limit)
+        total = len(review_queue) if continuous else min(limit, len(review_queue))
 
-        if not words:
+        if not total:
             print("\n✓ No words due for review. Great job!")
             return
 
+        prefetcher = CardPrefetcher(review_queue, limit=None if continuous else limit)
+        prefetcher.start()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-writer")
+
         print(f"\n{'='*50}")
-        print(f"  Starting Practice Session ({len(words)} words)")
+        print(f"  Starting Practice Session ({total} words)")
+        if time_budget:
+            print(f"  Time budget: {time_budget / 60:g} minutes")
         print(f"{'='*50}\n")
 
-        for i, word in enumerate(words, 1):
-            self.review_word(word, i, len(words))
+        try:
+            for i, word in enumerate(prefetcher, 1):
+                if deadline and time.time() >= deadline:
+                    print("\n⏱ Time's up!")
+                    break
+                self.review_word(word, i, max(total, i))
+        except BaseException:
+            self.interrupt()
+            raise
+        finally:
+            prefetcher.stop()
 
         self.finish()
 
@@ -39,28 +156,126 @@ class PracticeSession:
         if word['example_sentence']:
             print(f"   Example: {word['example_sentence']}")
 
+        asked = time.perf_counter()
         answer = input("   Your answer: ").strip()
+        latency_ms = int((time.perf_counter() - asked) * 1000)
+
+        match = self.grade(word, answer, latency_ms)
+        if match.typo:
+            print(f"   ✓ Correct, watch the spelling: {match.expected}")
+        elif match.correct:
+            print("   ✓ Correct!")
+        else:
+            print(f"   ✗ Incorrect (correct answer: {word['translation']})")
+            if is_lapse(word['interval'], grade_for(False)) and word['lapses'] + 1 >= LEECH_LAPSES:
+                print(f"   ⚠ Suspended after {LEECH_LAPSES} lapses; see 'leeches'")
+
+    def grade(self, word, answer, latency_ms: int = None):
+        """
+        Grade an answer and buffer it for the next flush.
+
+        Does no I/O besides the periodic flush, so it can also be used to
+        grade scripted answers in bulk. Returns the answer_matcher.Match;
+        answers accepted only as typos get a lower SM-2 grade.
+        """
+        if self.start_time is None:
+            self.start_time = time.time()
 
-        is_correct = answer.lower() == word['translation'].lower()
+        match = check_answer(answer, word['translation'])
+        is_correct = match.correct
 
         if is_correct:
-            print("   ✓ Correct!")
             self.correct += 1
         else:
-            print(f"   ✗ Incorrect (correct answer: {word['translation']})")
             self.incorrect += 1
-
         self.reviewed += 1
-        self.srs.update_word_review(word['id'], is_correct)
 
-    def finish(self):
-        """Finish the session and display statistics"""
+        # The new schedule is computed at flush time from the card's
+        # current state, so concurrent sessions can't overwrite each other
+        self.pending.append((word['id'], grade_for(is_correct, match.typo), latency_ms))
+        if len(self.pending) >= self.flush_every:
+            if self.writer is not None:
+                self._flush_in_background()
+            else:
+                self.flush()
+
+        return match
+
+    @retry_on_busy
+    def flush(self):
+        """
+        Reschedule and log the buffered answers in one transaction.
+
+        The buffer is only cleared once the write commits, so a failed
+        flush can simply be retried.
+        """
+        if not self.pending:
+            return
+        self.srs.apply_grades(self.pending, user_id=self.user_id)
+        self.pending = []
+
+    def _flush_in_background(self):
+        """Hand the buffered answers to the writer thread"""
+        batch, self.pending = self.pending, []
+        self.writes.append((self.writer.submit(self._write, batch), batch))
+
+    @retry_on_busy
+    def _write(self, batch):
+        self.srs.apply_grades(batch, user_id=self.user_id)
+
+    def _join_writer(self):
+        """
+        Wait for the background writes and stop the writer thread.
+
+        Answers from writes that failed go back into the buffer, so the
+        final commit writes them.
+        """
+        if self.writer is None:
+            return
+
+        failed = []
+        for future, batch in self.writes:
+            if future.exception() is not None:
+                failed.extend(batch)
+
+        self.writer.submit(database.close_connection)
+        self.writer.shutdown()
+        self.writer = None
+        self.writes = []
+        self.pending = failed + self.pending
+
+    def interrupt(self):
+        """Persist the answers given so far when a session is cut short"""
+        if not self.reviewed:
+            self._join_writer()
+            return
+        self._commit(*self._summary())
+
+    @retry_on_busy
+    def _commit(self, accuracy, duration):
+        """Flush buffered answers and record today's progress atomically"""
+        self._join_writer()
+        with transaction(immediate=True):
+            if self.pending:
+                self.srs.apply_grades(self.pending, user_id=self.user_id)
+            self.save_progress(accuracy, duration)
+        # Only drop the buffer once the transaction has committed
+        self.pending = []
+
+    def _summary(self):
+        """Return (accuracy, duration) for the session so far"""
         duration = int(time.time() - self.start_time)
 
         accuracy = 0
         if self.reviewed > 0:
             accuracy = (self.correct / self.reviewed) * 100
 
+        return accuracy, duration
+
+    def finish(self):
+        """Finish the session and display statistics"""
+        accuracy, duration = self._summary()
+
         print(f"\n{'='*50}")
         print("  Session Complete!")
         print(f"{'='*50}")
@@ -71,40 +286,38 @@ class PracticeSession:
         print(f"  Duration:  {duration} seconds")
         print(f"{'='*50}\n")
 
-        self.save_progress(accuracy, duration)
+        self._commit(accuracy, duration)
 
     def save_progress(self, accuracy, duration):
         """Save session progress to the database"""
-        conn = get_connection()
-        cursor = conn.cursor()
         today = date.today().strftime("%Y-%m-%d")
 
-        # Check if there's already a record for today
-        cursor.execute("""
-            SELECT id, words_reviewed, words_correct
-            FROM daily_progress
-            WHERE date = ?
-        """, (today,))
-
-        existing = cursor.fetchone()
+        with transaction(immediate=True) as conn:
+            cursor = conn.cursor()
 
-        if existing:
-            # Update existing record
+            # Check if there's already a record for today
             cursor.execute("""
-                UPDATE daily_progress
-                SET words_reviewed = words_reviewed + ?,
-                    words_correct = words_correct + ?,
-                    accuracy = ?,
-                    session_duration = session_duration + ?
-                WHERE date = ?
-            """, (self.reviewed, self.correct, accuracy, duration, today))
-        else:
-            # Insert new record
-            cursor.execute("""
-                INSERT INTO daily_progress
-                (date, words_reviewed, words_correct, accuracy, session_duration)
-                VALUES (?, ?, ?, ?, ?)
-            """, (today, self.reviewed, self.correct, accuracy, duration))
+                SELECT id, words_reviewed, words_correct
+                FROM daily_progress
+                WHERE user_id = ? AND date = ?
+            """, (self.user_id, today))
+
+            existing = cursor.fetchone()
 
-        conn.commit()
-        conn.close()
+            if existing:
+                # Update existing record
+                cursor.execute("""
+                    UPDATE daily_progress
+                    SET words_reviewed = words_reviewed + ?,
+                        words_correct = words_correct + ?,
+                        accuracy = ?,
+                        session_duration = session_duration + ?
+                    WHERE id = ?
+                """, (self.reviewed, self.correct, accuracy, duration, existing[0]))
+            else:
+                # Insert new record
+                cursor.execute("""
+                    INSERT INTO daily_progress
+                    (user_id, date, words_reviewed, words_correct, accuracy, session_duration)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (self.user_id, today, self.reviewed, self.correct, accuracy, duration))
@@ -0,0 +1,183 @@
+from collections import namedtuple
+from datetime import date, timedelta
+from app import database
+from app.database import DEFAULT_USER_ID, get_connection
+
+
+# Days that count towards a streak: any practice at all
+_ACTIVE = "(words_reviewed > 0 OR words_written > 0 OR minutes_spoken > 0)"
+
+# First day of the week or month a date falls in
+_PERIOD_START = {
+    "week": "date(date, '-6 days', 'weekday 1')",
+    "month": "date(date, 'start of month')",
+}
+
+# Periods in the accuracy trend's moving window
+TREND_PERIODS = 4
+
+# Intensity levels in the heatmap, from NTILE() over the active days
+HEATMAP_LEVELS = 4
+
+
+Streaks = namedtuple("Streaks", ["current", "longest", "longest_start", "longest_end", "active_days"])
+Streaks.__doc__ = """
+Practice streaks in days. `current` counts a streak that ended yesterday
+too, since today may not be practiced yet.
+"""
+
+PeriodTotal = namedtuple("PeriodTotal", [
+    "start", "days", "reviewed", "correct", "accuracy", "trend", "change", "seconds", "written",
+])
+PeriodTotal.__doc__ = """
+Totals for one week or month with any practice. `trend` is the accuracy
+over this and the previous TREND_PERIODS - 1 active periods, and `change`
+the difference in reviews from the previous active period (None for the
+first).
+"""
+
+
+class ProgressTracker:
+    """
+    Progress reports over a learner's daily_progress rows.
+
+    Each report is one window-function query over the (user_id, date)
+    index. Results are cached per process and keyed on the learner's
+    progress version, which triggers bump on every daily_progress write,
+    so a report is only recomputed after new practice.
+    """
+
+    # (database path, user_id, report, arguments) -> (version, result)
+    _cache = {}
+
+    @staticmethod
+    def version(user_id: int = DEFAULT_USER_ID):
+        """The learner's progress version; changes with every progress write"""
+        cursor = get_connection().cursor()
+        cursor.execute("SELECT version FROM progress_versions WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _cached(user_id, report, args, compute):
+        key = (str(database.DB_PATH), user_id, report, args)
+        version = ProgressTracker.version(user_id)
+
+        cached = ProgressTracker._cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        result = compute()
+        ProgressTracker._cache[key] = (version, result)
+        return result
+
+    @staticmethod
+    def streaks(today: date = None, user_id: int = DEFAULT_USER_ID):
+        """Return the learner's Streaks as of `today`"""
+        today = today or date.today()
+
+        def compute():
+            # Consecutive days share julianday(date) - row number
+            cursor = get_connection().cursor()
+            cursor.execute(f"""
+                WITH days AS (
+                    SELECT date FROM daily_progress
+                    WHERE user_id = ? AND date <= ? AND {_ACTIVE}
+                    GROUP BY date
+                )
+                SELECT MIN(date), MAX(date), COUNT(*)
+                FROM (
+                    SELECT date, julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS island
+                    FROM days
+                )
+                GROUP BY island
+                ORDER BY MIN(date)
+            """, (user_id, today.isoformat()))
+            runs = cursor.fetchall()
+
+            if not runs:
+                return Streaks(0, 0, None, None, 0)
+
+            longest = max(runs, key=lambda run: run[2])
+            last_start, last_end, last_days = runs[-1]
+            recent = (today - timedelta(days=1)).isoformat()
+            current = last_days if last_end >= recent else 0
+            return Streaks(current, longest[2], longest[0], longest[1],
+                           sum(run[2] for run in runs))
+
+        return ProgressTracker._cached(user_id, "streaks", (today,), compute)
+
+    @staticmethod
+    def totals(period: str = "week", count: int = 8, today: date = None,
+               user_id: int = DEFAULT_USER_ID):
+        """Return PeriodTotals for the last `count` weeks or months, oldest first"""
+        if period not in _PERIOD_START:
+            raise ValueError(f"Period must be 'week' or 'month', got '{period}'")
+
+        today = today or date.today()
+        first = _period_start(today, period, count - 1)
+        # Earlier periods feed the first rows' trend and change
+        since = _period_start(today, period, count + TREND_PERIODS - 2)
+
+        def compute():
+            cursor = get_connection().cursor()
+            cursor.execute(f"""
+                WITH periods AS (
+                    SELECT {_PERIOD_START[period]} AS start,
+                           COUNT(DISTINCT date) AS days,
+                           SUM(words_reviewed) AS reviewed,
+                           SUM(words_correct) AS correct,
+                           SUM(session_duration) AS seconds,
+                           SUM(words_written) AS written
+                    FROM daily_progress
+                    WHERE user_id = ? AND date BETWEEN ? AND ? AND {_ACTIVE}
+                    GROUP BY start
+                )
+                SELECT start, days, reviewed, correct,
+                       correct * 100.0 / NULLIF(reviewed, 0),
+                       SUM(correct) OVER (ORDER BY start ROWS {TREND_PERIODS - 1} PRECEDING) * 100.0
+                           / NULLIF(SUM(reviewed) OVER (ORDER BY start ROWS {TREND_PERIODS - 1} PRECEDING), 0),
+                       reviewed - LAG(reviewed) OVER (ORDER BY start),
+                       seconds, written
+                FROM periods
+                ORDER BY start
+            """, (user_id, since.isoformat(), today.isoformat()))
+
+            return [
+                PeriodTotal(*row) for row in cursor.fetchall()
+                if row[0] >= first.isoformat()
+            ]
+
+        return ProgressTracker._cached(user_id, "totals", (period, count, today), compute)
+
+    @staticmethod
+    def heatmap(days: int = 365, today: date = None, user_id: int = DEFAULT_USER_ID):
+        """
+        Return {date: (reviewed, level)} for the active days among the last
+        `days`. `level` runs from 1 to HEATMAP_LEVELS, quantiles of the
+        learner's own review counts.
+        """
+        today = today or date.today()
+        start = today - timedelta(days=days - 1)
+
+        def compute():
+            cursor = get_connection().cursor()
+            cursor.execute(f"""
+                SELECT date, SUM(words_reviewed) AS reviewed,
+                       NTILE({HEATMAP_LEVELS}) OVER (ORDER BY SUM(words_reviewed))
+                FROM daily_progress
+                WHERE user_id = ? AND date BETWEEN ? AND ?
+                GROUP BY date
+                HAVING reviewed > 0
+            """, (user_id, start.isoformat(), today.isoformat()))
+            return {day: (reviewed, level) for day, reviewed, level in cursor.fetchall()}
+
+        return ProgressTracker._cached(user_id, "heatmap", (days, today), compute)
+
+
+def _period_start(day: date, period: str, back: int = 0):
+    """First day of the week or month `back` periods before `day`'s"""
+    if period == "week":
+        return day - timedelta(days=day.weekday() + 7 * back)
+    months = day.year * 12 + day.month - 1 - back
+    return date(months // 12, months % 12 + 1, 1)
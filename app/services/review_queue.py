@@ -0,0 +1,231 @@
+from datetime import date, datetime
+import heapq
+import threading
+from app import database
+from app.database import DEFAULT_USER_ID, get_connection, plain_cursor
+from app.models.vocabulary import Vocabulary
+from app.services.scheduler import DEFAULT_EASE, LEECH_LAPSES
+
+
+# Daily caps: cards seen for the first time, and reviews of learned cards
+NEW_PER_DAY = 20
+REVIEWS_PER_DAY = 200
+
+# New cards rank like a review that is exactly due at the default ease,
+# so overdue or weak reviews come first
+NEW_PRIORITY = 1.0
+
+# How urgent a learned card is: its overdue days relative to its interval
+# (two days late on a 1-day card matters more than on a 60-day one),
+# weighted up for a low ease factor and for every lapse
+_PRIORITY = f"""
+    (1.0 + (julianday(?1) - julianday(next_review)) / MAX(interval, 1))
+    * {DEFAULT_EASE} / COALESCE(ease_factor, {DEFAULT_EASE})
+    * (1.0 + lapses * 1.0 / {LEECH_LAPSES})
+"""
+
+# Today's learned cards, most urgent first (?1 today, ?2 user_id, ?3 cap).
+# The index range covers every column read; the computed priority is
+# sorted in a temp b-tree, over the due range only.
+_DUE_REVIEWS = f"""
+    SELECT {_PRIORITY}, word_id
+    FROM user_cards
+    WHERE user_id = ?2 AND next_review <= ?1 AND interval > 0
+    ORDER BY 1 DESC, next_review, word_id
+    LIMIT ?3
+"""
+
+# Today's new cards in due order, same parameters
+_DUE_NEW = """
+    SELECT word_id
+    FROM user_cards
+    WHERE user_id = ?2 AND next_review <= ?1 AND COALESCE(interval, 0) = 0
+    ORDER BY next_review, word_id
+    LIMIT ?3
+"""
+
+# Cards due by a day (user_id, day), the queue's version
+_DUE_VERSION = """
+    SELECT COALESCE(SUM(cards), 0) FROM due_counts
+    WHERE user_id = ? AND day != '' AND day <= ?
+"""
+
+# What pop() and peek() return for each card
+_CARD_COLUMNS = ("v.word", "v.translation", "v.example_sentence", "v.level", "c.repetitions",
+                 "c.interval", "c.ease_factor", "c.next_review", "c.lapses")
+_CARD_KEYS = ("id",) + tuple(column[2:] for column in _CARD_COLUMNS)
+
+
+def load_cards(word_ids, user_id: int = DEFAULT_USER_ID):
+    """
+    Return a learner's cards for `word_ids` as dicts with the word's
+    content and scheduling state, in the order of `word_ids`.
+    """
+    word_ids = list(word_ids)
+    cards = Vocabulary.load_cards(word_ids, _CARD_COLUMNS, user_id)
+    return [dict(zip(_CARD_KEYS, (word_id,) + cards[word_id]))
+            for word_id in word_ids if word_id in cards]
+
+
+class ReviewQueue:
+    """
+    A learner's due cards for today, most urgent first.
+
+    Built with two range scans of the due index, one for learned cards
+    and one for new ones, each capped by what is left of today's limits
+    (answers already in today's review log count). The ranked card ids
+    are kept in a heap; pop() takes the next ones and loads their words
+    in one query, so working through the queue never re-reads the deck.
+    Answered cards are dropped lazily: discard() forgets their ids and
+    trims stale entries off the top of the heap, and the rest are skipped
+    when they come up. A cached queue is shared by threads, so heap
+    changes are made under the queue's lock.
+    Suspended cards (leeches) have no due date and are never queued.
+    """
+
+    # (database path, user_id, new_limit, review_limit) -> (version, ReviewQueue)
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, user_id: int = DEFAULT_USER_ID, today: date = None,
+                 new_limit: int = NEW_PER_DAY, review_limit: int = REVIEWS_PER_DAY):
+        self.user_id = user_id
+        self.today = today or date.today()
+        new_seen, reviewed = self.answered_today(self.today, user_id)
+
+        # None means no cap; SQLite reads LIMIT -1 as no limit
+        new_left = -1 if new_limit is None else max(0, new_limit - new_seen)
+        reviews_left = -1 if review_limit is None else max(0, review_limit - reviewed)
+
+        cursor = plain_cursor()
+        today_iso = self.today.isoformat()
+
+        self.heap = []
+        if reviews_left:
+            cursor.execute(_DUE_REVIEWS, (today_iso, user_id, reviews_left))
+            self.heap.extend((-priority, n, word_id) for n, (priority, word_id) in enumerate(cursor))
+
+        if new_left:
+            cursor.execute(_DUE_NEW, (today_iso, user_id, new_left))
+            self.heap.extend(
+                (-NEW_PRIORITY, n, word_id) for n, (word_id,) in enumerate(cursor, len(self.heap))
+            )
+
+        heapq.heapify(self.heap)
+        self.queued = {entry[2] for entry in self.heap}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, user_id: int = DEFAULT_USER_ID, new_limit: int = NEW_PER_DAY,
+                 review_limit: int = REVIEWS_PER_DAY):
+        """
+        Return the learner's queue for today, building it on first use.
+
+        The queue is cached per process. Answers graded through SRS take
+        their cards out of it in place (see answered()); it is rebuilt only
+        when something else changes what is due today, such as new cards
+        or another process's answers, which the version check notices.
+        """
+        key = (str(database.DB_PATH), user_id, new_limit, review_limit)
+        version = cls.version(user_id)
+
+        with cls._lock:
+            cached = cls._cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        review_queue = cls(user_id, new_limit=new_limit, review_limit=review_limit)
+        with cls._lock:
+            cls._cache[key] = (version, review_queue)
+        return review_queue
+
+    @classmethod
+    def answered(cls, word_ids, user_id: int = DEFAULT_USER_ID):
+        """Remove graded cards from the learner's cached queues"""
+        word_ids = set(word_ids)
+        path = str(database.DB_PATH)
+        version = None
+
+        with cls._lock:
+            for key, (_, review_queue) in list(cls._cache.items()):
+                if key[:2] != (path, user_id):
+                    continue
+                if version is None:
+                    version = cls.version(user_id)
+                review_queue.discard(word_ids)
+                cls._cache[key] = (version, review_queue)
+
+    @staticmethod
+    def version(user_id: int = DEFAULT_USER_ID, today: date = None):
+        """
+        The day and the number of cards due by then, from due_counts.
+        Answering a due card, adding a card and (un)suspending one all
+        change it.
+        """
+        today = today or date.today()
+        cursor = get_connection().cursor()
+        cursor.execute(_DUE_VERSION, (user_id, today.isoformat()))
+        return today, cursor.fetchone()[0]
+
+    @staticmethod
+    def answered_today(today: date = None, user_id: int = DEFAULT_USER_ID):
+        """Return (new cards seen, reviews of learned cards) from today's review log"""
+        today = today or date.today()
+        since = int(datetime.combine(today, datetime.min.time()).timestamp())
+
+        cursor = get_connection().cursor()
+        cursor.execute("""
+            SELECT COALESCE(SUM(old_interval = 0), 0), COALESCE(SUM(old_interval > 0), 0)
+            FROM review_log
+            WHERE user_id = ? AND reviewed_at >= ?
+        """, (user_id, since))
+        return tuple(cursor.fetchone())
+
+    def __len__(self):
+        return len(self.queued)
+
+    def pop(self, count: int = 1):
+        """Remove the `count` most urgent cards and return them as dicts"""
+        word_ids = []
+        with self.lock:
+            while self.heap and len(word_ids) < count:
+                word_id = heapq.heappop(self.heap)[2]
+                if word_id in self.queued:
+                    self.queued.discard(word_id)
+                    word_ids.append(word_id)
+        return load_cards(word_ids, self.user_id)
+
+    def peek(self, count: int = 1):
+        """
+        Return the `count` most urgent cards as dicts, leaving them queued.
+
+        Walks the heap from its root, a frontier of child entries at a
+        time, so it costs O(count log count) however long the queue is.
+        """
+        word_ids = []
+
+        with self.lock:
+            heap, queued = self.heap, self.queued
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(word_ids) < count:
+                entry, i = heapq.heappop(frontier)
+                if entry[2] in queued:
+                    word_ids.append(entry[2])
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+
+        return load_cards(word_ids, self.user_id)
+
+    def discard(self, word_ids):
+        """Remove cards from the queue, e.g. once they have been answered"""
+        with self.lock:
+            self.queued.difference_update(word_ids)
+
+            while self.heap and self.heap[0][2] not in self.queued:
+                heapq.heappop(self.heap)
+
+            # Compact once most entries are stale
+            if len(self.heap) > 2 * len(self.queued) + 64:
+                self.heap = [entry for entry in self.heap if entry[2] in self.queued]
+                heapq.heapify(self.heap)
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import date
+import queue
+import threading
+from app import database
+from app.database import retry_on_busy, transaction
+from app.services.scheduler import PASS_GRADE
+from app.services.srs import SRS
+
+
+# Sentinel that tells the writer thread to stop
+_STOP = object()
+
+
+class ReviewWriter(threading.Thread):
+    """
+    Dedicated thread that owns every review write.
+
+    Callers submit graded answers from any thread and get a Future back.
+    The thread takes whatever has queued up since its last commit (up to
+    MAX_BATCH answers, from any number of learners) and writes it in one
+    BEGIN IMMEDIATE transaction, so many concurrent clients share each
+    commit instead of paying for one each. A Future resolves only after
+    its answer has been committed.
+    """
+
+    MAX_BATCH = 1000
+
+    def __init__(self, max_batch: int = None):
+        super().__init__(name="review-writer", daemon=True)
+        self.max_batch = max_batch or self.MAX_BATCH
+        self.queue = queue.Queue()
+        self.commits = 0
+        self.written = 0
+
+    def submit(self, user_id: int, word_id: int, grade: int, latency_ms: int = None):
+        """Queue one graded answer; returns a Future resolved on commit"""
+        future = Future()
+        self.queue.put((user_id, word_id, grade, latency_ms, future))
+        return future
+
+    def stop(self):
+        """Write everything still queued, then stop the thread"""
+        self.queue.put(_STOP)
+        self.join()
+
+    def run(self):
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self.queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if _STOP in batch:
+                    stopping = True
+                    batch = [item for item in batch if item is not _STOP]
+                if batch:
+                    self._write(batch)
+        finally:
+            database.close_connection()
+
+    def _write(self, batch):
+        """Commit a batch and resolve its futures"""
+        try:
+            self._commit(batch)
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        self.commits += 1
+        self.written += len(batch)
+        for *_, future in batch:
+            future.set_result(True)
+
+    @retry_on_busy
+    def _commit(self, batch):
+        """Apply every learner's grades and daily totals in one transaction"""
+        by_user = defaultdict(list)
+        for user_id, word_id, grade, latency_ms, _ in batch:
+            by_user[user_id].append((word_id, grade, latency_ms))
+
+        with transaction(immediate=True):
+            for user_id, grades in by_user.items():
+                SRS.apply_grades(grades, user_id=user_id)
+                record_progress(
+                    user_id,
+                    reviewed=len(grades),
+                    correct=sum(1 for _, grade, _ in grades if grade >= PASS_GRADE)
+                )
+
+
+def record_progress(user_id: int, reviewed: int, correct: int, day: date = None):
+    """Add answers to a learner's daily_progress row for `day` (today)"""
+    day = (day or date.today()).strftime("%Y-%m-%d")
+
+    with transaction() as conn:
+        cursor = conn.execute("""
+            UPDATE daily_progress
+            SET words_reviewed = words_reviewed + ?,
+                words_correct = words_correct + ?,
+                accuracy = (words_correct + ?) * 100.0 / (words_reviewed + ?)
+            WHERE user_id = ? AND date = ?
+        """, (reviewed, correct, correct, reviewed, user_id, day))
+
+        if not cursor.rowcount:
+            conn.execute("""
+                INSERT INTO daily_progress
+                (user_id, date, words_reviewed, words_correct, accuracy)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, day, reviewed, correct, correct * 100.0 / reviewed if reviewed else 0))
@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure Python path gives the same results
+    np = None
+
+
+# =============================
+# SM-2 Parameters
+# =============================
+
+# Quality grades run from 0 (blackout) to 5 (perfect recall); 3+ is a pass
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASS_GRADE = 3
+
+# Grades used when an answer is only marked right or wrong
+GRADE_CORRECT = 4    # Leaves the ease factor unchanged
+GRADE_TYPO = 3       # Accepted, but only within the typo allowance
+GRADE_INCORRECT = 2
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# SM-2 uses 1 and 6 days; we keep the 1 -> 3 -> interval * ease progression
+# this app has always used
+FIRST_INTERVAL = 1
+SECOND_INTERVAL = 3
+
+# Intervals stop growing after 100 years, which keeps review dates valid
+MAX_INTERVAL = 36500
+
+# A lapse is a failed review of a card that had been learned before; cards
+# with this many lapses are "leeches" and get suspended
+LEECH_LAPSES = 8
+
+
+def grade_for(correct: bool, typo: bool = False) -> int:
+    """Map a right/wrong answer to an SM-2 quality grade"""
+    if not correct:
+        return GRADE_INCORRECT
+    return GRADE_TYPO if typo else GRADE_CORRECT
+
+
+def is_lapse(interval: int, grade: int) -> bool:
+    """True if failing with `grade` is a lapse for a card at `interval` days"""
+    return grade < PASS_GRADE and bool(interval)
+
+
+def next_ease(ease_factor: float, grade: int) -> float:
+    """Apply the SM-2 ease factor update for one review"""
+    miss = MAX_GRADE - grade
+    return max(MIN_EASE, ease_factor + 0.1 - miss * (0.08 + miss * 0.02))
+
+
+def sm2(repetitions: int, interval: int, ease_factor: float, grade: int):
+    """
+    Schedule one review with SM-2.
+
+    Returns (repetitions, interval, ease_factor). The interval grows with
+    the ease factor the card had before this review.
+    """
+    if not MIN_GRADE <= grade <= MAX_GRADE:
+        raise ValueError(f"Grade must be between {MIN_GRADE} and {MAX_GRADE}, got {grade}")
+
+    if ease_factor is None:
+        ease_factor = DEFAULT_EASE
+
+    if grade >= PASS_GRADE:
+        repetitions += 1
+
+        if repetitions == 1:
+            interval = FIRST_INTERVAL
+        elif repetitions == 2:
+            interval = SECOND_INTERVAL
+        else:
+            interval = min(MAX_INTERVAL, max(1, int(interval * ease_factor)))
+    else:
+        repetitions = 0
+        interval = FIRST_INTERVAL
+
+    return repetitions, interval, next_ease(ease_factor, grade)
+
+
+def review_date(interval: int, today=None) -> str:
+    """Return the YYYY-MM-DD date `interval` days after today"""
+    today = today or date.today()
+    return (today + timedelta(days=interval)).strftime("%Y-%m-%d")
+
+
+# =============================
+# Batch Scheduling
+# =============================
+
+def reschedule(repetitions, intervals, ease_factors, grades, today=None):
+    """
+    Schedule many reviews in one pass.
+
+    Takes parallel sequences of card state and grades and returns
+    (repetitions, intervals, ease_factors, next_reviews) as lists.
+    Uses NumPy when it is installed and a plain loop otherwise; both
+    give identical results.
+    """
+    today = today or date.today()
+
+    if np is not None and len(grades) > 0:
+        return _reschedule_numpy(repetitions, intervals, ease_factors, grades, today)
+    return _reschedule_python(repetitions, intervals, ease_factors, grades, today)
+
+
+def _reschedule_python(repetitions, intervals, ease_factors, grades, today):
+    new_reps, new_intervals, new_eases, next_reviews = [], [], [], []
+    dates = {}
+
+    for state in zip(repetitions, intervals, ease_factors, grades):
+        reps, interval, ease = sm2(*state)
+        if interval not in dates:
+            dates[interval] = review_date(interval, today)
+
+        new_reps.append(reps)
+        new_intervals.append(interval)
+        new_eases.append(ease)
+        next_reviews.append(dates[interval])
+
+    return new_reps, new_intervals, new_eases, next_reviews
+
+
+def _reschedule_numpy(repetitions, intervals, ease_factors, grades, today):
+    reps = np.asarray(repetitions, dtype=np.int64)
+    interval = np.asarray(intervals, dtype=np.int64)
+    ease = np.asarray(
+        [DEFAULT_EASE if e is None else e for e in ease_factors], dtype=np.float64
+    )
+    grade = np.asarray(grades, dtype=np.int64)
+
+    if grade.min() < MIN_GRADE or grade.max() > MAX_GRADE:
+        raise ValueError(f"Grades must be between {MIN_GRADE} and {MAX_GRADE}")
+
+    reps, interval, ease = sm2_arrays(reps, interval, ease, grade)
+    next_reviews = (np.datetime64(today, "D") + interval).astype(str)
+
+    return reps.tolist(), interval.tolist(), ease.tolist(), next_reviews.tolist()
+
+
+def sm2_arrays(repetitions, intervals, ease_factors, grades):
+    """
+    sm2() over whole NumPy arrays at once (requires NumPy).
+
+    Takes arrays of card state and valid grades and returns new
+    (repetitions, intervals, ease_factors) arrays.
+    """
+    passed = grades >= PASS_GRADE
+    reps = np.where(passed, repetitions + 1, 0)
+
+    # Grown intervals first, then the fixed ones written over them in
+    # place; a failed card has reps == 0 and restarts at FIRST_INTERVAL
+    interval = (intervals * ease_factors).astype(np.int64)
+    np.clip(interval, 1, MAX_INTERVAL, out=interval)
+    interval[reps <= 1] = FIRST_INTERVAL
+    interval[reps == 2] = SECOND_INTERVAL
+
+    # Same arithmetic as next_ease(), with the penalty looked up per grade
+    ease = ease_factors + 0.1
+    ease -= _EASE_PENALTY[grades]
+    np.maximum(ease, MIN_EASE, out=ease)
+
+    return reps, interval, ease
+
+
+if np is not None:
+    # next_ease()'s penalty, miss * (0.08 + miss * 0.02), for each grade
+    _EASE_PENALTY = np.array([
+        (MAX_GRADE - grade) * (0.08 + (MAX_GRADE - grade) * 0.02)
+        for grade in range(MIN_GRADE, MAX_GRADE + 1)
+    ])
@@ -1,86 +1,194 @@
-from datetime import datetime, timedelta
-from app.database import get_connection
+from itertools import repeat
+import time
+from app.database import DEFAULT_USER_ID, after_commit, get_connection, retry_on_busy, transaction
+from app.models.review_log import ReviewLog
+from app.models.vocabulary import Vocabulary
+from app.services.review_queue import NEW_PER_DAY, REVIEWS_PER_DAY, ReviewQueue
+from app.services.scheduler import LEECH_LAPSES, grade_for, is_lapse, reschedule, review_date, sm2
+
+
+# Write a graded card's new state. ?5 is 1 for a lapse; a card reaching
+# LEECH_LAPSES lapses is suspended and loses its due date, which takes it
+# out of the due queue, due counts and forecasts until unsuspend().
+_UPDATE_CARD = f"""
+    UPDATE user_cards
+    SET repetitions = ?1, interval = ?2, ease_factor = ?3,
+        lapses = lapses + ?5,
+        suspended = suspended OR lapses + ?5 >= {LEECH_LAPSES},
+        next_review = CASE WHEN suspended OR lapses + ?5 >= {LEECH_LAPSES} THEN NULL ELSE ?4 END
+    WHERE user_id = ?6 AND word_id = ?7
+"""
+
+# A card's state as load_cards() returns it for sm2()
+_STATE_COLUMNS = ("c.repetitions", "c.interval", "c.ease_factor")
 
 
 class SRS:
     """Spaced Repetition System for vocabulary learning"""
 
     @staticmethod
-    def get_due_words(limit: int = 10):
-        """Get words that are due for review today"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def get_due_words(limit: int = 10, user_id: int = DEFAULT_USER_ID,
+                      new_limit: int = NEW_PER_DAY, review_limit: int = REVIEWS_PER_DAY):
+        """
+        Get up to `limit` of a learner's most urgent due words, within
+        today's new and review caps. The words stay queued until they are
+        answered, so repeated calls return the same words.
+        """
+        return ReviewQueue.for_user(user_id, new_limit, review_limit).peek(limit)
 
-        today = datetime.today().strftime("%Y-%m-%d")
-
-        cursor.execute("""
-            SELECT id, word, translation, example_sentence, level
-            FROM vocabulary
-            WHERE next_review <= ?
-            ORDER BY next_review
-            LIMIT ?
-        """, (today, limit))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        # Convert rows to dictionaries
-        words = []
-        for row in rows:
-            words.append({
-                'id': row[0],
-                'word': row[1],
-                'translation': row[2],
-                'example_sentence': row[3],
-                'level': row[4]
-            })
-
-        return words
+    @staticmethod
+    def schedule(repetitions: int, interval: int, ease_factor: float, grade: int, today=None):
+        """
+        Compute the next scheduling state for a card with SM-2.
+
+        `grade` is a 0-5 quality grade (see scheduler.grade_for() for
+        right/wrong answers). Returns (repetitions, interval, ease_factor,
+        next_review) without touching the database, so callers can grade
+        cards in memory and write later.
+        """
+        repetitions, interval, ease_factor = sm2(repetitions, interval, ease_factor, grade)
+        return repetitions, interval, ease_factor, review_date(interval, today)
 
     @staticmethod
-    def update_word_review(word_id: int, correct: bool):
-        """Update word review based on SRS algorithm"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    @retry_on_busy
+    def update_word_review(word_id: int, correct: bool, grade: int = None,
+                           latency_ms: int = None, user_id: int = DEFAULT_USER_ID):
+        """
+        Update word review based on SRS algorithm and log the answer.
 
-        cursor.execute("""
-            SELECT repetitions, interval, ease_factor
-            FROM vocabulary
-            WHERE id = ?
-        """, (word_id,))
+        `grade` overrides the default grade for a right or wrong answer.
+        """
+        if grade is None:
+            grade = grade_for(correct)
 
-        result = cursor.fetchone()
+        # Take the write lock before reading so no other process can update
+        # the card between our SELECT and UPDATE
+        with transaction(immediate=True) as conn:
+            cursor = conn.cursor()
 
-        if not result:
-            conn.close()
-            return
+            cursor.execute("""
+                SELECT repetitions, interval, ease_factor
+                FROM user_cards
+                WHERE user_id = ? AND word_id = ?
+            """, (user_id, word_id))
 
-        repetitions, interval, ease_factor = result
+            result = cursor.fetchone()
 
-        today = datetime.today()
+            if not result:
+                return
 
-        if correct:
-            repetitions += 1
+            state = SRS.schedule(*result, grade)
 
-            if repetitions == 1:
-                interval = 1
-            elif repetitions == 2:
-                interval = 3
-            else:
-                interval = int(interval * ease_factor)
+            cursor.execute(_UPDATE_CARD, (*state, is_lapse(result[1], grade), user_id, word_id))
 
-            next_review = today + timedelta(days=interval)
+            ReviewLog.append([
+                ReviewLog.event(word_id, grade, result[1], state[1], latency_ms)
+            ], user_id)
 
-        else:
-            repetitions = 0
-            interval = 1
-            next_review = today + timedelta(days=1)
+            after_commit(lambda: ReviewQueue.answered([word_id], user_id))
 
+    @staticmethod
+    @retry_on_busy
+    def apply_grades(grades, today=None, log: bool = True, user_id: int = DEFAULT_USER_ID):
+        """
+        Grade many cards in one learner's deck at once.
+
+        `grades` holds (word_id, grade) or (word_id, grade, latency_ms)
+        tuples. Current states are read in bulk, rescheduled in one
+        vectorized pass by scheduler.reschedule() and written back with one
+        executemany, all in a single BEGIN IMMEDIATE transaction, so
+        concurrent writers can't lose each other's updates. A card graded
+        several times has its grades applied in order. Each grade is also
+        appended to the review log unless `log` is False (e.g. when
+        re-simulating a deck). Returns the number of grades applied.
+        """
+        grades = [tuple(entry) + (None,) * (3 - len(entry)) for entry in grades]
+        updated = 0
+
+        with transaction(immediate=True) as conn:
+            for batch in _rounds(grades):
+                states = Vocabulary.load_cards(
+                    (word_id for word_id, _, _ in batch), _STATE_COLUMNS, user_id
+                )
+
+                found = [entry for entry in batch if entry[0] in states]
+                if not found:
+                    continue
+
+                reps, intervals, eases, next_reviews = reschedule(
+                    [states[word_id][0] for word_id, _, _ in found],
+                    [states[word_id][1] for word_id, _, _ in found],
+                    [states[word_id][2] for word_id, _, _ in found],
+                    [grade for _, grade, _ in found],
+                    today
+                )
+
+                conn.executemany(_UPDATE_CARD, zip(
+                    reps, intervals, eases, next_reviews,
+                    (is_lapse(states[word_id][1], grade) for word_id, grade, _ in found),
+                    repeat(user_id), (word_id for word_id, _, _ in found)
+                ))
+                updated += len(found)
+
+                if log:
+                    reviewed_at = int(time.time())
+                    ReviewLog.append((
+                        ReviewLog.event(word_id, grade, states[word_id][1], interval,
+                                        latency_ms, reviewed_at)
+                        for (word_id, grade, latency_ms), interval in zip(found, intervals)
+                    ), user_id)
+
+            answered = [word_id for word_id, _, _ in grades]
+            after_commit(lambda: ReviewQueue.answered(answered, user_id))
+
+        return updated
+
+    @staticmethod
+    def get_leeches(user_id: int = DEFAULT_USER_ID):
+        """Return a learner's suspended cards as (id, word, translation, lapses) rows"""
+        cursor = get_connection().cursor()
         cursor.execute("""
-            UPDATE vocabulary
-            SET repetitions = ?, interval = ?, next_review = ?
-            WHERE id = ?
-        """, (repetitions, interval, next_review.strftime("%Y-%m-%d"), word_id))
+            SELECT v.id, v.word, v.translation, c.lapses
+            FROM user_cards c
+            JOIN vocabulary v ON v.id = c.word_id
+            WHERE c.user_id = ? AND c.suspended
+            ORDER BY c.lapses DESC, v.word
+        """, (user_id,))
+        return cursor.fetchall()
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def unsuspend(word_ids=None, today=None, user_id: int = DEFAULT_USER_ID):
+        """
+        Put suspended cards (all of the learner's when `word_ids` is None)
+        back in the queue, due today with their lapse count reset. Returns
+        the number of cards unsuspended.
+        """
+        due = review_date(0, today)
+        with transaction() as conn:
+            if word_ids is None:
+                return conn.execute("""
+                    UPDATE user_cards SET suspended = 0, lapses = 0, next_review = ?
+                    WHERE user_id = ? AND suspended
+                """, (due, user_id)).rowcount
+
+            cursor = conn.executemany("""
+                UPDATE user_cards SET suspended = 0, lapses = 0, next_review = ?
+                WHERE user_id = ? AND word_id = ? AND suspended
+            """, ((due, user_id, word_id) for word_id in word_ids))
+            return cursor.rowcount
+
+
+def _rounds(grades):
+    """
+    Split grade tuples into batches where each word id appears once,
+    keeping each card's grades in their original order.
+    """
+    rounds = []
+    seen = {}
+    for entry in grades:
+        n = seen.get(entry[0], 0)
+        seen[entry[0]] = n + 1
+        if n == len(rounds):
+            rounds.append([])
+        rounds[n].append(entry)
+    return rounds
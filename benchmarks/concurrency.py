@@ -0,0 +1,124 @@
+"""
+Multi-process stress test for concurrent grading.
+
+Starts several worker processes that grade the same cards at the same
+time, half through SRS.update_word_review() and half through buffered
+PracticeSession flushes, then checks that no update was lost: every card
+must have as many repetitions as correct answers it received, and the
+review log must hold one row per answer. tests/test_concurrency.py runs
+a small instance of it. Run from the repository root:
+
+    python3 -m benchmarks.concurrency --workers 8 --cards 50 --rounds 20
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app import database
+
+
+def worker(db_path, worker_id, card_ids, rounds, errors):
+    """Grade every card `rounds` times, always correctly."""
+    from app.services.srs import SRS
+    from app.services.practice_engine import PracticeSession
+    from app.services.scheduler import GRADE_CORRECT
+
+    database.configure(db_path=db_path)
+    try:
+        if worker_id % 2:
+            for _ in range(rounds):
+                for card_id in card_ids:
+                    SRS.update_word_review(card_id, True)
+        else:
+            session = PracticeSession(SRS(), flush_every=len(card_ids))
+            for _ in range(rounds):
+                for card_id in card_ids:
+                    session.pending.append((card_id, GRADE_CORRECT, None))
+                session.flush()
+    except Exception as e:
+        errors.put(f"worker {worker_id}: {e}")
+    finally:
+        database.close_all()
+
+
+def stress(workers=8, cards=50, rounds=20):
+    """
+    Run the stress test on a fresh temporary database. Returns the
+    elapsed seconds, the number of grades and a list of failures.
+    """
+    previous = database.DB_PATH
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "stress.db"
+        database.configure(db_path=db_path)
+        database.init_db()
+
+        with database.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO vocabulary (word, word_key, translation) VALUES (?, ?, ?)
+            """, (
+                (f"word{i}", database.normalize_word(f"word{i}"), f"translation{i}")
+                for i in range(cards)
+            ))
+            conn.execute("""
+                INSERT INTO user_cards (user_id, word_id, next_review)
+                SELECT ?, id, '2000-01-01' FROM vocabulary
+            """, (database.DEFAULT_USER_ID,))
+        card_ids = [row[0] for row in database.get_connection().execute("SELECT id FROM vocabulary")]
+        database.close_all()
+
+        errors = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(db_path, n, card_ids, rounds, errors))
+            for n in range(workers)
+        ]
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        expected = workers * rounds
+        conn = database.get_connection()
+        lost = conn.execute(
+            "SELECT COUNT(*) FROM user_cards WHERE repetitions != ?", (expected,)
+        ).fetchone()[0]
+        logged = conn.execute("SELECT COUNT(*) FROM review_log").fetchone()[0]
+        database.configure(db_path=previous)
+
+    total = expected * cards
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    if lost:
+        failures.append(f"{lost} cards lost updates")
+    if logged != total:
+        failures.append(f"review_log has {logged} rows, expected {total}")
+
+    return elapsed, total, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent grading stress test")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    elapsed, total, failures = stress(args.workers, args.cards, args.rounds)
+    print(f"{args.workers} workers, {total} grades in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+
+    for failure in failures:
+        print(f"✗ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✓ No lost updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for the packed grammar exercise bank.
+
+Builds a synthetic bank (topics x levels x items per level), then times
+opening it and picking exercises by topic, by topic and level, and
+across the whole bank. Run from the repository root:
+
+    python3 -m benchmarks.grammar_bank --topics 40 --items 2000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.models.vocabulary import LEVELS
+from app.services.exercise_bank import Exercise, ExerciseBank, build_bank
+
+
+def exercises(topics, items, seed=0):
+    """Yield `items` synthetic exercises per topic and level"""
+    rng = random.Random(seed)
+    for t in range(topics):
+        for level in LEVELS:
+            for n in range(items):
+                verb = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9)))
+                yield Exercise(
+                    f"topic {t:02d}", level,
+                    f"Yesterday she ___ ({verb}) to the station before {n} o'clock.",
+                    f"{verb}ed", "Past simple" if rng.random() < 0.5 else None
+                )
+
+
+def timed(func, runs):
+    """Median wall time of `runs` calls, in ms"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grammar exercise bank benchmark")
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--items", type=int, default=2000, help="Items per topic and level")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bank.bin"
+
+        start = time.perf_counter()
+        count = build_bank(exercises(args.topics, args.items), path)
+        build = time.perf_counter() - start
+        print(f"{count:,} exercises, {path.stat().st_size / 1e6:.1f} MB, built in {build:.2f}s")
+
+        print(f"  open bank       {timed(lambda: ExerciseBank(path).close(), args.runs):8.3f} ms")
+        topic = f"topic {args.topics // 2:02d}"
+        with ExerciseBank(path) as bank:
+            print(f"  pick 10 topic   {timed(lambda: bank.pick(topic, count=10), args.runs):8.3f} ms")
+            print(f"  pick 10 level   "
+                  f"{timed(lambda: bank.pick(topic, 'advanced', count=10), args.runs):8.3f} ms")
+            print(f"  pick 10 mixed   {timed(lambda: bank.pick(count=10), args.runs):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Load test for the HTTP review API.
+
+Starts `main.py serve` on a scratch database with several learners,
+then runs many keep-alive clients that each fetch due cards and post
+answers for them in a loop. Reports sustained requests/sec, answers/sec
+and latency percentiles. Run from the repository root:
+
+    python3 -m benchmarks.load_test --clients 50 --duration 10
+
+Pass --url to load an already running instance instead; its database
+must have due cards for the learners used (u0, u1, ...).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from app import database
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def fill_decks(users, cards):
+    """Give each learner `cards` due cards over a shared vocabulary."""
+    with database.transaction() as conn:
+        conn.executemany("""
+            INSERT INTO vocabulary (word, word_key, translation) VALUES (?, ?, ?)
+        """, (
+            (f"word{i}", database.normalize_word(f"word{i}"), f"translation{i}")
+            for i in range(cards)
+        ))
+        conn.executemany("""
+            INSERT INTO users (name, created_at) VALUES (?, date('now'))
+        """, ((f"u{n}",) for n in range(users)))
+        conn.execute("""
+            INSERT INTO user_cards (user_id, word_id, next_review)
+            SELECT u.id, v.id, '2000-01-01'
+            FROM users u CROSS JOIN vocabulary v
+            WHERE u.name LIKE 'u%'
+        """)
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one request on a keep-alive connection and return the JSON body."""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: localhost\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"\r\n".encode("ascii") + body
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    data = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"{method} {path} -> {status}: {data.get('error')}")
+    return data
+
+
+async def client(host, port, user, deadline, latencies, counts, batch):
+    """Fetch due cards and answer them until the deadline."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            due = await request(reader, writer, "GET", f"/due?user={user}&limit={batch}")
+            latencies["due"].append(time.perf_counter() - start)
+            counts["requests"] += 1
+
+            for card in due["cards"]:
+                number = card["word"][len("word"):]
+                answer = f"translation{number}" if random.random() < 0.8 else "wrong"
+
+                start = time.perf_counter()
+                await request(reader, writer, "POST", "/answers", {
+                    "user": user, "word_id": card["id"], "answer": answer,
+                    "latency_ms": random.randint(500, 5000),
+                })
+                latencies["answer"].append(time.perf_counter() - start)
+                counts["requests"] += 1
+                counts["answers"] += 1
+
+                if time.perf_counter() >= deadline:
+                    break
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, clients, users, duration, batch):
+    latencies = {"due": [], "answer": []}
+    counts = {"requests": 0, "answers": 0}
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        client(host, port, f"u{n % users}", deadline, latencies, counts, batch)
+        for n in range(clients)
+    ))
+    return time.perf_counter() - start, latencies, counts
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+
+
+async def wait_for_port(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP review API load test")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent connections")
+    parser.add_argument("--users", type=int, default=10, help="Learners the clients spread over")
+    parser.add_argument("--cards", type=int, default=2000, help="Due cards per learner")
+    parser.add_argument("--batch", type=int, default=10, help="Cards fetched per /due call")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", type=str, help="Test a running server instead of starting one")
+    args = parser.parse_args(argv)
+
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            host, port = "127.0.0.1", args.port
+            db_path = Path(tmp) / "load.db"
+            database.configure(db_path=db_path)
+            database.init_db()
+            fill_decks(args.users, args.cards)
+            database.close_all()
+
+            env = dict(os.environ, ENGLISH_TRAINER_DB=str(db_path))
+            # Lift the daily caps so every due card can be answered
+            server = subprocess.Popen(
+                [sys.executable, str(ROOT / "main.py"), "serve", "--port", str(port),
+                 "--new", str(args.cards), "--reviews", str(args.cards)],
+                env=env, stdout=subprocess.DEVNULL
+            )
+
+        try:
+            asyncio.run(wait_for_port(host, port))
+            elapsed, latencies, counts = asyncio.run(
+                run_load(host, port, args.clients, args.users, args.duration, args.batch)
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(f"{args.clients} clients, {args.users} learners, {elapsed:.1f}s")
+    print(f"  requests: {counts['requests']:>8} ({counts['requests'] / elapsed:,.0f}/s)")
+    print(f"  answers:  {counts['answers']:>8} ({counts['answers'] / elapsed:,.0f}/s)")
+    for name, values in latencies.items():
+        print(f"  {name:<7} p50 {percentile(values, 50):6.2f} ms   "
+              f"p99 {percentile(values, 99):6.2f} ms   "
+              f"mean {statistics.mean(values) * 1000 if values else 0:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
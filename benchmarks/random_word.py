@@ -0,0 +1,91 @@
+"""
+Latency of Vocabulary.get_random_word() as the deck grows.
+
+Builds scratch decks of increasing size and compares the id-probing
+sampler with the old ORDER BY RANDOM() query. Run from the repository
+root:
+
+    python3 -m benchmarks.random_word --sizes 1000 100000 1000000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app import database
+from app.models.vocabulary import Vocabulary, LEVELS
+
+
+ORDER_BY_RANDOM = """
+    SELECT v.id, v.word, v.translation, v.example_sentence, v.level, c.next_review,
+           c.interval, c.ease_factor, c.repetitions
+    FROM user_cards c
+    JOIN vocabulary v ON v.id = c.word_id
+    WHERE c.user_id = ?
+    ORDER BY RANDOM()
+    LIMIT 1
+"""
+
+
+def fill_deck(size):
+    """Grow the default learner's deck to `size` cards."""
+    with database.transaction() as conn:
+        start = conn.execute("SELECT COUNT(*) FROM vocabulary").fetchone()[0]
+        conn.executemany("""
+            INSERT INTO vocabulary (word, word_key, translation, level) VALUES (?, ?, ?, ?)
+        """, (
+            (f"word{i}", database.normalize_word(f"word{i}"), f"translation{i}",
+             LEVELS[i % len(LEVELS)])
+            for i in range(start, size)
+        ))
+        conn.execute("""
+            INSERT INTO user_cards (user_id, word_id, next_review)
+            SELECT ?, id, '2026-' || printf('%02d-%02d', 1 + id % 12, 1 + id % 28)
+            FROM vocabulary WHERE id > ?
+        """, (database.DEFAULT_USER_ID, start))
+
+
+def time_calls(func, runs):
+    """Return per-call latencies in microseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random word sampler benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 10000, 100000, 1000000],
+                        help="Deck sizes to test, ascending")
+    parser.add_argument("--runs", type=int, default=200, help="Calls per measurement")
+    parser.add_argument("--random-runs", type=int, default=5,
+                        help="Calls per ORDER BY RANDOM() measurement")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure(db_path=Path(tmp) / "random.db")
+        database.init_db()
+        cursor = database.get_connection().cursor()
+
+        print(f"{'cards':>10} {'sampler us':>12} {'level us':>10} {'RANDOM() us':>12}")
+        for size in sorted(args.sizes):
+            fill_deck(size)
+
+            sampler = time_calls(Vocabulary.get_random_word, args.runs)
+            filtered = time_calls(lambda: Vocabulary.get_random_word(level="advanced"), args.runs)
+            baseline = time_calls(
+                lambda: cursor.execute(ORDER_BY_RANDOM, (database.DEFAULT_USER_ID,)).fetchone(), args.random_runs
+            )
+
+            print(f"{size:>10} {statistics.median(sampler):>12.1f} "
+                  f"{statistics.median(filtered):>10.1f} {statistics.median(baseline):>12.1f}")
+
+        database.close_all()
+
+
+if __name__ == "__main__":
+    main()
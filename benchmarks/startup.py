@@ -0,0 +1,102 @@
+"""
+Cold-start benchmark for the CLI.
+
+Runs simple commands in fresh interpreters against a scratch database
+and reports the median wall time of each, plus the in-process cost of
+init_db() with and without a current schema version. Run from the
+repository root:
+
+    python3 -m benchmarks.startup --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = [
+    ["--help"],
+    ["list"],
+    ["stats"],
+]
+
+
+def time_process(argv, env, runs):
+    """Return wall-clock timings in milliseconds for running argv."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            argv,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def time_command(args, env, runs):
+    """Return wall-clock timings in milliseconds for `main.py args`."""
+    return time_process([sys.executable, str(ROOT / "main.py"), *args], env, runs)
+
+
+def time_init_db(db_path, runs):
+    """
+    Time init_db() in-process on a current database and on one whose
+    schema version has been reset, which forces the full migration.
+    """
+    from app import database
+
+    database.configure(db_path=db_path)
+    database.init_db()
+
+    current, stale = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        database.init_db()
+        current.append((time.perf_counter() - start) * 1000)
+
+        database.get_connection().execute("PRAGMA user_version = 0;")
+        start = time.perf_counter()
+        database.init_db()
+        stale.append((time.perf_counter() - start) * 1000)
+
+    database.close_all()
+    return current, stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command (default: 10)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, ENGLISH_TRAINER_DB=str(Path(tmp) / "bench.db"))
+
+        # Create the schema once so every timed run sees an initialized database
+        time_command(["stats"], env, 1)
+
+        # Bare interpreter start-up, the floor for every command
+        rows = [("(python)", time_process([sys.executable, "-c", "pass"], env, args.runs))]
+        for command in COMMANDS:
+            rows.append((" ".join(command), time_command(command, env, args.runs)))
+
+        current, stale = time_init_db(Path(tmp) / "init.db", args.runs)
+        rows.append(("init_db", current))
+        rows.append(("init_db*", stale))
+
+    print(f"{'command':<12} {'median ms':>10} {'min ms':>10}")
+    for name, timings in rows:
+        print(f"{name:<12} {statistics.median(timings):>10.2f} {min(timings):>10.2f}")
+    print("\n* schema version reset, so init_db() runs every migration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Benchmark suite for every data path.
+
+Builds a seeded synthetic deck (benchmarks/deck.py) for each size and
+times the model and service entry points against it, from single-card
+reads to full practice sessions driven by scripted answers. Results can
+be written as JSON and compared against a saved baseline. Run from the
+repository root:
+
+    python3 -m benchmarks.suite --sizes 1000 100000 --output before.json
+    # ...change something...
+    python3 -m benchmarks.suite --sizes 1000 100000 --baseline before.json
+
+With --baseline, scenarios whose median got slower than --threshold
+percent are flagged and the exit status is 1.
+"""
+import argparse
+import contextlib
+from datetime import datetime
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app import database
+from app.database import DEFAULT_USER_ID
+from app.models.vocabulary import Vocabulary
+from app.services import scheduler
+from app.services.practice_engine import PracticeSession
+from app.services.srs import SRS
+from benchmarks.deck import generate_deck, translation_for
+
+SIZES = [1000, 100000, 1000000]
+
+# Share of scripted answers that are right
+ACCURACY = 0.8
+
+
+class Context:
+    """State shared by the scenarios for one deck size"""
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.rng = random.Random(seed)
+
+    def card_id(self):
+        """A random card id in the deck"""
+        return self.rng.randint(1, self.size)
+
+    def answer(self, word):
+        """A scripted answer, right ACCURACY of the time"""
+        if self.rng.random() < ACCURACY:
+            return translation_for(word)
+        return "wrong"
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+# Each takes a Context and runs one operation. Read-only scenarios come
+# first so the writes that follow don't change what they measure.
+
+def get_due_words(ctx):
+    SRS.get_due_words(20)
+
+
+def get_due_words_100(ctx):
+    SRS.get_due_words(100)
+
+
+def get_all_words(ctx):
+    Vocabulary.get_all_words()
+
+
+def list_first_page(ctx):
+    list(Vocabulary.iter_words(limit=50))
+
+
+def get_random_word(ctx):
+    Vocabulary.get_random_word()
+
+
+def get_random_word_level(ctx):
+    Vocabulary.get_random_word(level="advanced")
+
+
+def get_random_word_due(ctx):
+    Vocabulary.get_random_word(due=True)
+
+
+def search(ctx):
+    Vocabulary.search("ab")
+
+
+def update_word_review(ctx):
+    SRS.update_word_review(ctx.card_id(), ctx.rng.random() < ACCURACY)
+
+
+def apply_grades_500(ctx):
+    SRS.apply_grades([
+        (ctx.card_id(), ctx.rng.choice((scheduler.GRADE_CORRECT, scheduler.GRADE_INCORRECT)))
+        for _ in range(500)
+    ])
+
+
+def save_progress(ctx):
+    session = PracticeSession(SRS())
+    session.reviewed, session.correct = 20, 16
+    session.save_progress(80.0, 300)
+
+
+def make_due(ctx, count=20):
+    """Setup: make `count` random cards the most overdue and script answers for them"""
+    ids = [ctx.card_id() for _ in range(count)]
+    with database.transaction() as conn:
+        conn.executemany("""
+            UPDATE user_cards SET next_review = '2000-01-01' WHERE user_id = ? AND word_id = ?
+        """, ((DEFAULT_USER_ID, word_id) for word_id in ids))
+    words = SRS.get_due_words(count)
+    ctx.answers = "".join(ctx.answer(word["word"]) + "\n" for word in words)
+
+
+def session_run(ctx):
+    """A full 20-word PracticeSession.run() answering from scripted stdin"""
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(ctx.answers)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            PracticeSession(SRS()).run(limit=20)
+    finally:
+        sys.stdin = stdin
+
+
+# name -> (function, heavy, setup); heavy scenarios read the whole deck, so
+# they run at most HEAVY_RUNS times on large decks. `setup`, if given, runs
+# untimed before each call.
+SCENARIOS = {
+    "get_due_words": (get_due_words, False, None),
+    "get_due_words_100": (get_due_words_100, False, None),
+    "get_all_words": (get_all_words, True, None),
+    "list_first_page": (list_first_page, False, None),
+    "get_random_word": (get_random_word, False, None),
+    "get_random_word_level": (get_random_word_level, False, None),
+    "get_random_word_due": (get_random_word_due, False, None),
+    "search": (search, False, None),
+    "update_word_review": (update_word_review, False, None),
+    "apply_grades_500": (apply_grades_500, False, None),
+    "save_progress": (save_progress, False, None),
+    "session_run": (session_run, False, make_due),
+}
+
+HEAVY_RUNS = 3
+HEAVY_SIZE = 100000
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def measure(func, ctx, runs, setup=None):
+    """Time `runs` calls after one warm-up; returns a result dict (ms)"""
+    timings = []
+    for n in range(runs + 1):
+        if setup:
+            setup(ctx)
+        start = time.perf_counter()
+        func(ctx)
+        if n:
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        "runs": runs,
+        "median_ms": round(median, 4),
+        "p95_ms": round(timings[min(runs - 1, int(runs * 0.95))], 4),
+        "min_ms": round(timings[0], 4),
+        "ops_per_sec": round(1000 / median, 1) if median else None,
+    }
+
+
+def run_suite(sizes, runs, seed, names, progress=print):
+    """Run the chosen scenarios on a fresh deck of each size"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            database.configure(db_path=Path(tmp) / f"deck{size}.db")
+            database.init_db()
+
+            start = time.perf_counter()
+            generate_deck(size, seed=seed, user_id=DEFAULT_USER_ID)
+            progress(f"  deck of {size:,} cards built in {time.perf_counter() - start:.1f}s")
+
+            ctx = Context(size, seed)
+            for name in names:
+                func, heavy, setup = SCENARIOS[name]
+                count = min(runs, HEAVY_RUNS) if heavy and size >= HEAVY_SIZE else runs
+                result = dict(scenario=name, size=size, **measure(func, ctx, count, setup))
+                results.append(result)
+                progress(f"  {name:<24}{size:>9,} {result['median_ms']:>10.3f} ms")
+
+            database.close_all()
+
+    return results
+
+
+def metadata(seed):
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print each result next to the baseline median. Returns the scenarios
+    that got slower by more than `threshold` percent.
+    """
+    before = {(r["scenario"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+
+    print(f"\n{'scenario':<24}{'size':>9} {'base ms':>10} {'now ms':>10} {'change':>9}")
+    for result in results:
+        key = (result["scenario"], result["size"])
+        old = before.get(key)
+        if old is None:
+            print(f"{key[0]:<24}{key[1]:>9,} {'-':>10} {result['median_ms']:>10.3f} {'new':>9}")
+            continue
+
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+        flag = ""
+        if change > threshold:
+            flag = " ✗"
+            regressions.append(key)
+        elif change < -threshold:
+            flag = " ✓"
+        print(f"{key[0]:<24}{key[1]:>9,} {old['median_ms']:>10.3f} "
+              f"{result['median_ms']:>10.3f} {change:>+8.1f}%{flag}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite for every data path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="Deck sizes (default: 1000 100000 1000000)")
+    parser.add_argument("--runs", type=int, default=50, help="Timed calls per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Deck and answer seed")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), metavar="SCENARIO",
+                        help="Run only these scenarios")
+    parser.add_argument("--output", type=str, help="Write results as JSON to this file")
+    parser.add_argument("--baseline", type=str, help="Compare against a saved JSON result")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown flagged as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    names = [name for name in SCENARIOS if not args.only or name in args.only]
+    results = run_suite(sorted(args.sizes), args.runs, args.seed, names)
+    report = {"meta": metadata(args.seed), "results": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} scenarios slower than the baseline "
+                  f"by more than {args.threshold:g}%")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
-from app.database import init_db
 from app.cli import run
 
-init_db()
+# run() initializes the database once it knows a command needs it
 run()
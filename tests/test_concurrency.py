@@ -0,0 +1,19 @@
+"""
+Concurrent grading from several processes must not lose updates. A small
+run of benchmarks.concurrency; the benchmark takes larger sizes.
+"""
+import unittest
+
+from benchmarks.concurrency import stress
+
+
+class ConcurrentGradingTest(unittest.TestCase):
+
+    def test_no_lost_updates(self):
+        _, total, failures = stress(workers=4, cards=20, rounds=5)
+        self.assertEqual(total, 400)
+        self.assertEqual(failures, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
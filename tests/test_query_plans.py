@@ -0,0 +1,89 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot queries, so nobody regresses them
+to table scans. Each test explains the statement the app itself runs.
+Run from the repository root:
+
+    python3 -m unittest discover tests
+"""
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from app import database
+from app.models import stats, vocabulary
+from app.services import review_queue
+
+DUE_RANGE = "SEARCH user_cards USING COVERING INDEX idx_user_cards_queue (user_id=? AND next_review<?)"
+
+
+class QueryPlanTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.previous = database.DB_PATH
+        cls.tmp = tempfile.TemporaryDirectory()
+        database.configure(db_path=Path(cls.tmp.name) / "plans.db")
+        database.init_db()
+
+    @classmethod
+    def tearDownClass(cls):
+        database.configure(db_path=cls.previous)
+        cls.tmp.cleanup()
+
+    def plan(self, sql):
+        """The plan of `sql`, with every parameter bound to 1"""
+        numbered = [int(n) for n in re.findall(r"\?(\d+)", sql)]
+        count = max(numbered) if numbered else sql.count("?")
+        return database.query_plan(sql, [1] * count)
+
+    def test_due_reviews_sort_only_the_due_range(self):
+        # The priority is computed, so it needs a sort, but only of the
+        # cards the queue index range returns
+        self.assertEqual(self.plan(review_queue._DUE_REVIEWS),
+                         [DUE_RANGE, "USE TEMP B-TREE FOR ORDER BY"])
+
+    def test_due_new_cards_use_the_queue_index_order(self):
+        self.assertEqual(self.plan(review_queue._DUE_NEW),
+                         [DUE_RANGE, "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY"])
+
+    def test_queue_version_uses_the_due_counts_key(self):
+        self.assertEqual(self.plan(review_queue._DUE_VERSION),
+                         ["SEARCH due_counts USING PRIMARY KEY (user_id=? AND day<?)"])
+
+    def test_word_pages_walk_the_word_index_for_large_decks(self):
+        self.assertEqual(self.plan(vocabulary.word_page_sql(True, after=True)), [
+            "SEARCH v USING INDEX idx_vocabulary_word (word>?)",
+            "SEARCH c USING PRIMARY KEY (user_id=? AND word_id=?)",
+        ])
+        self.assertEqual(self.plan(vocabulary.word_page_sql(True, level=True, after=True)), [
+            "SEARCH v USING INDEX idx_vocabulary_level_word (level=? AND word>?)",
+            "SEARCH c USING PRIMARY KEY (user_id=? AND word_id=?)",
+        ])
+
+    def test_word_pages_start_from_the_cards_for_small_decks(self):
+        self.assertEqual(self.plan(vocabulary.word_page_sql(False, after=True)), [
+            "SEARCH c USING PRIMARY KEY (user_id=?)",
+            "SEARCH v USING INTEGER PRIMARY KEY (rowid=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ])
+        self.assertEqual(self.plan(vocabulary.word_page_sql(False, due=True, after=True)), [
+            "SEARCH c USING INDEX idx_user_cards_queue (user_id=? AND next_review<?)",
+            "SEARCH v USING INTEGER PRIMARY KEY (rowid=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ])
+
+    def test_adding_cards_looks_words_up_by_key(self):
+        self.assertEqual(self.plan(vocabulary._ADD_CARD), [
+            "SEARCH vocabulary USING COVERING INDEX idx_vocabulary_word_key (word_key=?)"
+        ])
+
+    def test_accuracy_uses_the_date_index(self):
+        self.assertEqual(self.plan(stats._ACCURACY), [
+            "SEARCH daily_progress USING INDEX idx_daily_progress_user_date "
+            "(user_id=? AND date>? AND date<?)"
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()